@@ -1,10 +1,23 @@
 from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
-from transformers import MarianMTModel, MarianTokenizer
-import torch
 import os
+import hmac
+import json
 from dotenv import load_dotenv
 import logging
+from inference_pool import InferenceClient
+from profiling import StageTimer
+from live_session import LiveTranslationSession
+from scheduler import PRIORITIES
+from capture import TrafficRecorder
+from model_loader import ModelLoading
+from languages import get_model_name
+
+# WebSocket live translation is optional (pip install flask-sock)
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +28,7 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+sock = Sock(app) if Sock is not None else None
 
 # Supported languages mapping
 SUPPORTED_LANGUAGES = {
@@ -41,79 +55,100 @@ SUPPORTED_LANGUAGES = {
     'vi': 'Vietnamese'
 }
 
-# Model cache to avoid reloading models
-model_cache = {}
+# Requests wait a bounded time for cold models, then get 503 with Retry-After
+MODEL_LOAD_WAIT = float(os.environ.get('MODEL_LOAD_WAIT', 5))
+MAX_MODEL_LOAD_WAIT = float(os.environ.get('MAX_MODEL_LOAD_WAIT', 60))
+
+# Priority class of requests that do not set one, and API keys that are always bulk
+DEFAULT_PRIORITY = os.environ.get('DEFAULT_PRIORITY', 'interactive')
+BULK_API_KEYS = {key.strip() for key in os.environ.get('BULK_API_KEYS', '').split(',') if key.strip()}
+
+# Forward inference to the dedicated model-holding pool (see inference_pool.py)
+INFERENCE_SERVER = os.environ.get('INFERENCE_SERVER', 'false').lower() == 'true'
+inference_client = InferenceClient.from_env() if INFERENCE_SERVER else None
+
+# Models run in this process unless they live in the pool; pool mode keeps
+# torch and the engine state out of the HTTP workers
+engine = None
+if inference_client is None:
+    import engine
+    engine.start_usage_prefetch()
+
+# Opt-in capture of request shapes for replay.py
+TRAFFIC_CAPTURE_PATH = os.environ.get('TRAFFIC_CAPTURE_PATH')
+traffic_recorder = TrafficRecorder(
+    TRAFFIC_CAPTURE_PATH,
+    include_text=os.environ.get('TRAFFIC_CAPTURE_TEXT', 'false').lower() == 'true',
+    sample_rate=float(os.environ.get('TRAFFIC_CAPTURE_SAMPLE', 1.0))
+) if TRAFFIC_CAPTURE_PATH else None
+
+# Admin endpoints, e.g. on-demand profiling, are disabled without a token
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
 
-def get_model_name(source_lang, target_lang):
-    """Get the Hugging Face model name for the language pair"""
-    model_mapping = {
-        ('en', 'es'): 'Helsinki-NLP/opus-mt-en-es',
-        ('es', 'en'): 'Helsinki-NLP/opus-mt-es-en',
-        ('en', 'fr'): 'Helsinki-NLP/opus-mt-en-fr',
-        ('fr', 'en'): 'Helsinki-NLP/opus-mt-fr-en',
-        ('en', 'de'): 'Helsinki-NLP/opus-mt-en-de',
-        ('de', 'en'): 'Helsinki-NLP/opus-mt-de-en',
-        ('en', 'it'): 'Helsinki-NLP/opus-mt-en-it',
-        ('it', 'en'): 'Helsinki-NLP/opus-mt-it-en',
-        ('en', 'pt'): 'Helsinki-NLP/opus-mt-en-pt',
-        ('pt', 'en'): 'Helsinki-NLP/opus-mt-pt-en',
-        ('en', 'ru'): 'Helsinki-NLP/opus-mt-en-ru',
-        ('ru', 'en'): 'Helsinki-NLP/opus-mt-ru-en',
-        ('en', 'ja'): 'Helsinki-NLP/opus-mt-en-jap',
-        ('ja', 'en'): 'Helsinki-NLP/opus-mt-jap-en',
-        ('en', 'ko'): 'Helsinki-NLP/opus-mt-en-ko',
-        ('ko', 'en'): 'Helsinki-NLP/opus-mt-ko-en',
-        ('en', 'zh'): 'Helsinki-NLP/opus-mt-en-zh',
-        ('zh', 'en'): 'Helsinki-NLP/opus-mt-zh-en',
-        ('en', 'ar'): 'Helsinki-NLP/opus-mt-en-ar',
-        ('ar', 'en'): 'Helsinki-NLP/opus-mt-ar-en',
-        ('en', 'hi'): 'Helsinki-NLP/opus-mt-en-hi',
-        ('hi', 'en'): 'Helsinki-NLP/opus-mt-hi-en',
-    }
-    return model_mapping.get((source_lang, target_lang))
+def run_translation(text, source_lang, target_lang, timer=None, cancel_event=None, priority='interactive',
+                    load_wait=None):
+    """Translate in this process or on the inference pool, depending on the mode"""
+    if inference_client is not None:
+        if timer is None:
+            return inference_client.translate(text, source_lang, target_lang, cancel_event=cancel_event,
+                                              priority=priority, load_wait=load_wait)
+        with timer.stage('forward'):
+            return inference_client.translate(text, source_lang, target_lang, timer=timer,
+                                              cancel_event=cancel_event, priority=priority,
+                                              load_wait=load_wait)
+    return engine.translate_text(text, source_lang, target_lang, timer=timer, cancel_event=cancel_event,
+                                 priority=priority, load_wait=load_wait)
 
-def load_translation_model(source_lang, target_lang):
-    """Load or get cached translation model"""
-    model_key = f"{source_lang}_{target_lang}"
+def resolve_load_wait(data):
+    """Get how long a request may wait for a cold model, capped by the server"""
+    try:
+        wait = float(data.get('wait_seconds', MODEL_LOAD_WAIT))
+    except (TypeError, ValueError):
+        raise ValueError('wait_seconds must be a number')
+    return min(max(wait, 0.0), MAX_MODEL_LOAD_WAIT)
+
+def resolve_priority(data):
+    """Get the priority class of a request from its API key or `priority` field"""
+    # Bulk API keys cannot opt back into the interactive lane
+    if request.headers.get('X-API-Key') in BULK_API_KEYS:
+        return 'bulk'
     
-    if model_key in model_cache:
-        return model_cache[model_key]
+    priority = str(data.get('priority') or DEFAULT_PRIORITY).lower()
+    if priority not in PRIORITIES:
+        raise ValueError(f'Priority "{priority}" is not supported')
+    return priority
+
+def validate_translation_request(text, source_lang, target_lang):
+    """Get the validation error for a translation request, or None if it is valid"""
+    if not text:
+        return 'Text is required'
     
-    model_name = get_model_name(source_lang, target_lang)
-    if not model_name:
-        raise ValueError(f"Translation from {source_lang} to {target_lang} is not supported")
+    if not source_lang or not target_lang:
+        return 'Source and target languages are required'
     
-    try:
-        logger.info(f"Loading model: {model_name}")
-        tokenizer = MarianTokenizer.from_pretrained(model_name)
-        model = MarianMTModel.from_pretrained(model_name)
-        
-        # Cache the model
-        model_cache[model_key] = (tokenizer, model)
-        return tokenizer, model
-    except Exception as e:
-        logger.error(f"Error loading model {model_name}: {str(e)}")
-        raise
+    if source_lang not in SUPPORTED_LANGUAGES:
+        return f'Source language "{source_lang}" is not supported'
+    
+    if target_lang not in SUPPORTED_LANGUAGES:
+        return f'Target language "{target_lang}" is not supported'
+    
+    return None
 
-def translate_text(text, source_lang, target_lang):
-    """Translate text from source language to target language"""
-    try:
-        tokenizer, model = load_translation_model(source_lang, target_lang)
-        
-        # Tokenize input
-        inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-        
-        # Generate translation
-        with torch.no_grad():
-            outputs = model.generate(**inputs, max_length=512, num_beams=4, early_stopping=True)
-        
-        # Decode output
-        translated_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
-        
-        return translated_text
-    except Exception as e:
-        logger.error(f"Translation error: {str(e)}")
-        raise
+def request_prefetch(source_lang, target_lang):
+    """Hint that a pair is about to be used, wherever its model lives"""
+    if inference_client is not None:
+        # A hint is best effort, so an unreachable pool process only skips it
+        try:
+            return inference_client.prefetch(source_lang, target_lang)
+        except RuntimeError as e:
+            logger.warning(f"Prefetch of {source_lang}_{target_lang} skipped: {str(e)}")
+            return 'skipped'
+    return engine.prefetcher.hint(source_lang, target_lang)
+
+def is_admin_request():
+    """Check the admin token on the current request"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
 
 @app.route('/')
 def index():
@@ -155,29 +190,18 @@ def translate():
         target_lang = data.get('target_lang', '').lower()
         
         # Validation
-        if not text:
+        error = validate_translation_request(text, source_lang, target_lang)
+        if error:
             return jsonify({
                 'success': False,
-                'error': 'Text is required'
+                'error': error
             }), 400
         
-        if not source_lang or not target_lang:
-            return jsonify({
-                'success': False,
-                'error': 'Source and target languages are required'
-            }), 400
+        priority = resolve_priority(data)
+        load_wait = resolve_load_wait(data)
         
-        if source_lang not in SUPPORTED_LANGUAGES:
-            return jsonify({
-                'success': False,
-                'error': f'Source language "{source_lang}" is not supported'
-            }), 400
-        
-        if target_lang not in SUPPORTED_LANGUAGES:
-            return jsonify({
-                'success': False,
-                'error': f'Target language "{target_lang}" is not supported'
-            }), 400
+        if traffic_recorder is not None:
+            traffic_recorder.record(source_lang, target_lang, text, priority)
         
         if source_lang == target_lang:
             return jsonify({
@@ -188,16 +212,34 @@ def translate():
             })
         
         # Translate text
-        translated_text = translate_text(text, source_lang, target_lang)
+        timer = StageTimer()
+        with timer.stage('total'):
+            translated_text = run_translation(text, source_lang, target_lang, timer=timer, priority=priority,
+                                              load_wait=load_wait)
         
-        return jsonify({
+        result = {
             'success': True,
             'translated_text': translated_text,
             'source_lang': source_lang,
             'target_lang': target_lang,
-            'original_text': text
-        })
+            'original_text': text,
+            'priority': priority
+        }
+        if data.get('include_timings'):
+            result['timings'] = timer.as_dict()
+        
+        response = jsonify(result)
+        response.headers['Server-Timing'] = timer.header_value()
+        return response
         
+    except ModelLoading as e:
+        response = jsonify({
+            'success': False,
+            'error': 'The translation model is loading, please retry shortly',
+            'loading': e.progress
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
     except ValueError as e:
         return jsonify({
             'success': False,
@@ -210,6 +252,70 @@ def translate():
             'error': 'Internal server error'
         }), 500
 
+def live_translate(ws):
+    """Live translation session: only the latest text of the editor is translated"""
+    def translate_latest(text, source_lang, target_lang, cancel_event=None):
+        if source_lang == target_lang:
+            return text
+        try:
+            return run_translation(text, source_lang, target_lang, cancel_event=cancel_event,
+                                   load_wait=MAX_MODEL_LOAD_WAIT)
+        except ModelLoading:
+            raise ValueError('The translation model is loading, please retry shortly')
+    
+    session = LiveTranslationSession(lambda payload: ws.send(json.dumps(payload)), translate_latest)
+    
+    try:
+        while True:
+            message = ws.receive()
+            if message is None:
+                break
+            
+            try:
+                data = json.loads(message)
+            except ValueError:
+                ws.send(json.dumps({'success': False, 'error': 'Invalid JSON message'}))
+                continue
+            
+            request_id = data.get('id')
+            text = data.get('text', '').strip()
+            source_lang = data.get('source_lang', '').lower()
+            target_lang = data.get('target_lang', '').lower()
+            
+            error = validate_translation_request(text, source_lang, target_lang)
+            if error:
+                ws.send(json.dumps({'id': request_id, 'success': False, 'error': error}))
+                continue
+            
+            session.submit(request_id, text, source_lang, target_lang)
+    finally:
+        session.close()
+
+if sock is not None:
+    sock.route('/ws/translate')(live_translate)
+
+@app.route('/api/prefetch', methods=['POST'])
+def prefetch_model():
+    """Start loading the model for a pair the user has just selected"""
+    data = request.get_json() or {}
+    source_lang = data.get('source_lang', '').lower()
+    target_lang = data.get('target_lang', '').lower()
+    
+    if source_lang not in SUPPORTED_LANGUAGES or target_lang not in SUPPORTED_LANGUAGES:
+        return jsonify({
+            'success': False,
+            'error': 'Supported source and target languages are required'
+        }), 400
+    
+    status = 'skipped' if source_lang == target_lang else request_prefetch(source_lang, target_lang)
+    
+    return jsonify({
+        'success': True,
+        'source_lang': source_lang,
+        'target_lang': target_lang,
+        'status': status
+    }), 202
+
 @app.route('/api/detect', methods=['POST'])
 def detect_language():
     """Detect the language of the input text (simplified version)"""
@@ -254,6 +360,76 @@ def detect_language():
             'error': 'Language detection failed'
         }), 500
 
+@app.route('/health/ready', methods=['GET'])
+def readiness():
+    """Loaded pairs, per-pair queue depth and latency, and free model memory"""
+    try:
+        status = inference_client.status() if inference_client is not None else engine.engine_status()
+    except RuntimeError as e:
+        logger.error(f"Readiness check failed: {str(e)}")
+        return jsonify({
+            'status': 'unavailable',
+            'service': 'Multilingual Translator API',
+            'error': str(e)
+        }), 503
+    
+    return jsonify({
+        'status': 'degraded' if status.get('unavailable_workers') else 'ready',
+        'service': 'Multilingual Translator API',
+        **status
+    })
+
+@app.route('/api/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """Capture cProfile or PyTorch profiles of the next N requests for a pair"""
+    if not is_admin_request():
+        return jsonify({
+            'success': False,
+            'error': 'Admin token required'
+        }), 403
+    
+    if request.method == 'GET':
+        status = inference_client.profile_status() if inference_client is not None else engine.profile_capture.status()
+        return jsonify({
+            'success': True,
+            'profiles': status
+        })
+    
+    try:
+        data = request.get_json() or {}
+        source_lang = (data.get('source_lang') or '').lower()
+        target_lang = (data.get('target_lang') or '').lower()
+        mode = data.get('mode', 'cprofile')
+        try:
+            count = int(data.get('count', 1))
+        except (TypeError, ValueError):
+            raise ValueError('Profile count must be an integer')
+        
+        if not get_model_name(source_lang, target_lang):
+            return jsonify({
+                'success': False,
+                'error': f'Translation from {source_lang} to {target_lang} is not supported'
+            }), 400
+        
+        if inference_client is not None:
+            inference_client.arm_profile(source_lang, target_lang, count, mode)
+        else:
+            engine.profile_capture.arm(f"{source_lang}_{target_lang}", count, mode)
+        
+        return jsonify({
+            'success': True,
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'count': count,
+            'mode': mode
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark vocabulary shortlisting against full-vocabulary decoding
+
+Translates a held-out tab-separated set with and without the pair's
+shortlist and reports decoding speedup alongside quality.
+
+Usage:
+    python benchmark_shortlist.py --source en --target es --heldout heldout.tsv
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+import torch
+from transformers import MarianMTModel, MarianTokenizer
+
+from languages import get_model_name
+from shortlist import DEFAULT_SHORTLIST_DIR, load_shortlist, generate_with_shortlist, read_parallel
+
+
+def unigram_f1(hypotheses, references):
+    """Corpus-level unigram F1, used when sacrebleu is not installed"""
+    matches = hypothesis_total = reference_total = 0
+    for hypothesis, reference in zip(hypotheses, references):
+        hypothesis_tokens = Counter(hypothesis.lower().split())
+        reference_tokens = Counter(reference.lower().split())
+        matches += sum((hypothesis_tokens & reference_tokens).values())
+        hypothesis_total += sum(hypothesis_tokens.values())
+        reference_total += sum(reference_tokens.values())
+
+    if not matches:
+        return 0.0
+    precision = matches / hypothesis_total
+    recall = matches / reference_total
+    return 100 * 2 * precision * recall / (precision + recall)
+
+
+def quality(hypotheses, references):
+    """Score translations against references"""
+    try:
+        import sacrebleu
+        return 'BLEU', sacrebleu.corpus_bleu(hypotheses, [references]).score
+    except ImportError:
+        return 'unigram F1', unigram_f1(hypotheses, references)
+
+
+def translate_all(model, tokenizer, sources, batch_size, shortlist=None):
+    """Translate every source sentence and time the decoding"""
+    translations = []
+    vocab_sizes = []
+    elapsed = 0.0
+
+    for start in range(0, len(sources), batch_size):
+        batch = sources[start:start + batch_size]
+        inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=512)
+
+        started = time.perf_counter()
+        with torch.no_grad():
+            if shortlist is not None:
+                outputs = generate_with_shortlist(model, tokenizer, shortlist, inputs,
+                                                  max_length=512, num_beams=4, early_stopping=True)
+                vocab_sizes.append(len(shortlist.candidates(inputs['input_ids'], set())))
+            else:
+                outputs = model.generate(**inputs, max_length=512, num_beams=4, early_stopping=True)
+        elapsed += time.perf_counter() - started
+
+        translations.extend(tokenizer.batch_decode(outputs, skip_special_tokens=True))
+
+    return translations, elapsed, vocab_sizes
+
+
+def main():
+    """Run the shortlist benchmark for one language pair"""
+    parser = argparse.ArgumentParser(description='Benchmark vocabulary shortlisting')
+    parser.add_argument('--source', required=True, help='Source language code')
+    parser.add_argument('--target', required=True, help='Target language code')
+    parser.add_argument('--heldout', required=True, help='Tab-separated held-out source/reference set')
+    parser.add_argument('--limit', type=int, default=200, help='Maximum sentences to translate')
+    parser.add_argument('--batch-size', type=int, default=1, help='Sentences per generate call')
+    parser.add_argument('--shortlist-dir', default=os.environ.get('SHORTLIST_DIR', DEFAULT_SHORTLIST_DIR))
+    args = parser.parse_args()
+
+    model_name = get_model_name(args.source, args.target)
+    if not model_name:
+        print(f"❌ Translation from {args.source} to {args.target} is not supported")
+        sys.exit(1)
+
+    shortlist = load_shortlist(f"{args.source}_{args.target}", args.shortlist_dir)
+    if shortlist is None:
+        print(f"❌ No shortlist for {args.source}_{args.target} in {args.shortlist_dir}; build one with shortlist.py")
+        sys.exit(1)
+
+    pairs = read_parallel(args.heldout, args.limit)
+    if not pairs:
+        print(f"❌ No sentence pairs found in {args.heldout}")
+        sys.exit(1)
+    sources = [source for source, _ in pairs]
+    references = [reference for _, reference in pairs]
+
+    tokenizer = MarianTokenizer.from_pretrained(model_name)
+    model = MarianMTModel.from_pretrained(model_name)
+    model.eval()
+
+    print(f"🚀 Benchmarking {model_name} on {len(pairs)} held-out sentences")
+    print("=" * 50)
+
+    # Warm up once so neither run pays first-call overhead
+    translate_all(model, tokenizer, sources[:1], 1)
+
+    full, full_time, _ = translate_all(model, tokenizer, sources, args.batch_size)
+    shortlisted, shortlisted_time, vocab_sizes = translate_all(model, tokenizer, sources, args.batch_size, shortlist)
+
+    metric, full_score = quality(full, references)
+    _, shortlisted_score = quality(shortlisted, references)
+    identical = sum(a == b for a, b in zip(full, shortlisted))
+
+    print(f"Full vocabulary:   {tokenizer.vocab_size} tokens, {full_time:.2f}s, {metric} {full_score:.2f}")
+    print(f"Shortlisted:       {sum(vocab_sizes) / len(vocab_sizes):.0f} tokens on average, "
+          f"{shortlisted_time:.2f}s, {metric} {shortlisted_score:.2f}")
+    print(f"Speedup:           {full_time / shortlisted_time:.2f}x")
+    print(f"Identical outputs: {identical}/{len(pairs)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Production traffic capture for the Multilingual Translator
+
+Appends the shape of each translation request (pair, length, priority and
+arrival time) to a JSONL file that replay.py can play back. Request text is
+only recorded when explicitly enabled.
+"""
+
+import json
+import time
+import random
+import threading
+
+
+class TrafficRecorder:
+    """Writes anonymized request shapes to a JSONL capture file"""
+
+    def __init__(self, path, include_text=False, sample_rate=1.0):
+        self.path = path
+        self.include_text = include_text
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._file = None
+
+    def record(self, source_lang, target_lang, text, priority):
+        """Capture one request, subject to the sample rate"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        entry = {
+            'timestamp': time.time(),
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'length': len(text),
+            'priority': priority
+        }
+        if self.include_text:
+            entry['text'] = text
+
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            # One write per line keeps appends from several workers intact
+            self._file.write(line)
+            self._file.flush()
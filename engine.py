@@ -0,0 +1,312 @@
+"""
+Translation engine for the Multilingual Translator
+
+Holds the model cache, the background model loader and the inference path.
+The Flask app runs it in-process by default; the inference pool imports it
+in each model-holding process without building the web app. In inference
+server mode the HTTP workers never import it, so they do not load torch.
+"""
+
+from transformers import MarianMTModel, MarianTokenizer, StoppingCriteria, StoppingCriteriaList
+import torch
+import os
+from dotenv import load_dotenv
+import logging
+from profiling import StageTimer, ProfileCapture
+from shortlist import load_shortlist, generate_with_shortlist
+from languages import get_model_name
+from live_session import TranslationCancelled
+from prefetch import UsageTracker, Prefetcher
+from compiled import parse_buckets, bucket_for, compile_for_inference, restore_eager, eager_view
+from metrics import InferenceMetrics
+from scheduler import PriorityScheduler
+from spans import protect_spans, has_translatable_text, restore_spans
+from model_loader import ModelLoader, ModelLoading
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Model cache to avoid reloading models
+model_cache = {}
+
+# Cold loads run on dedicated threads so requests can give up waiting
+MODEL_LOAD_CONCURRENCY = int(os.environ.get('MODEL_LOAD_CONCURRENCY', 1))
+
+# Memory budget for resident models; 0 disables the limit
+MODEL_MEMORY_BUDGET_MB = int(os.environ.get('MODEL_MEMORY_BUDGET_MB', 0))
+MODEL_SIZE_ESTIMATE_MB = int(os.environ.get('MODEL_SIZE_ESTIMATE_MB', 300))
+
+# Keep URLs, emails, numbers, code and markup out of the model
+PROTECT_SPANS = os.environ.get('PROTECT_SPANS', 'true').lower() == 'true'
+
+# Beam search settings shared by requests and compile warmup
+GENERATE_KWARGS = {'max_length': 512, 'num_beams': 4, 'early_stopping': True}
+
+# Compiled inference for selected pairs ("en_es,en_fr" or "*")
+COMPILE_PAIRS = {key.strip() for key in os.environ.get('COMPILE_PAIRS', '').split(',') if key.strip()}
+COMPILE_BACKEND = os.environ.get('COMPILE_BACKEND', 'inductor')
+WARMUP_BUCKETS = parse_buckets(os.environ.get('WARMUP_BUCKETS'))
+compile_status = {}
+
+# Priority lanes: interactive work first, bulk guaranteed a minimum share
+INFERENCE_CONCURRENCY = int(os.environ.get('INFERENCE_CONCURRENCY', 1))
+BULK_MIN_SHARE = float(os.environ.get('BULK_MIN_SHARE', 0.2))
+scheduler = PriorityScheduler(INFERENCE_CONCURRENCY, BULK_MIN_SHARE)
+
+# Background preloading of hinted pairs, and of the busiest pairs by usage
+# persisted to PREFETCH_USAGE_PATH (the usage scan is off without it)
+PREFETCH_TOP_K = int(os.environ.get('PREFETCH_TOP_K', 3))
+PREFETCH_INTERVAL = int(os.environ.get('PREFETCH_INTERVAL', 30))
+PREFETCH_USAGE_PATH = os.environ.get('PREFETCH_USAGE_PATH')
+
+# Vocabulary shortlists built offline with shortlist.py
+VOCAB_SHORTLIST = os.environ.get('VOCAB_SHORTLIST', 'false').lower() == 'true'
+SHORTLIST_DIR = os.environ.get('SHORTLIST_DIR', 'shortlists')
+shortlist_cache = {}
+
+# On-demand profiling of the next N requests for a pair
+profile_capture = ProfileCapture(os.environ.get('PROFILE_DIR', 'profiles'))
+
+class CancelledCriteria(StoppingCriteria):
+    """Stops `generate` at the next decoding step once the event is set"""
+    
+    def __init__(self, cancel_event):
+        self.cancel_event = cancel_event
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.cancel_event.is_set(), dtype=torch.bool)
+
+def cancellation_criteria(cancel_event):
+    """Build the stopping criteria that abort decoding on cancellation"""
+    return StoppingCriteriaList([CancelledCriteria(cancel_event)])
+
+def _load_model(source_lang, target_lang, report_phase):
+    """Load a model from disk or the hub; runs on the model loader threads"""
+    model_key = f"{source_lang}_{target_lang}"
+    model_name = get_model_name(source_lang, target_lang)
+    
+    try:
+        logger.info(f"Loading model: {model_name}")
+        report_phase('tokenizer')
+        tokenizer = MarianTokenizer.from_pretrained(model_name)
+        report_phase('model')
+        model = MarianMTModel.from_pretrained(model_name)
+        
+        if '*' in COMPILE_PAIRS or model_key in COMPILE_PAIRS:
+            report_phase('compiling')
+            status = compile_for_inference(model, tokenizer, WARMUP_BUCKETS, GENERATE_KWARGS,
+                                           backend=COMPILE_BACKEND)
+            compile_status[model_key] = status
+            logger.info(f"Model {model_key} running {status['mode']}, "
+                        f"steady state after {status['time_to_steady_state']}s")
+        
+        # Cache the model
+        model_cache[model_key] = (tokenizer, model)
+        return tokenizer, model
+    except Exception as e:
+        logger.error(f"Error loading model {model_name}: {str(e)}")
+        raise
+
+model_loader = ModelLoader(_load_model, MODEL_LOAD_CONCURRENCY)
+
+def load_translation_model(source_lang, target_lang, wait=None):
+    """Load or get cached translation model
+    
+    Cold models load on the model loader threads. With `wait` set, raises
+    ModelLoading if the model is not ready within that many seconds.
+    """
+    model_key = f"{source_lang}_{target_lang}"
+    
+    if model_key in model_cache:
+        return model_cache[model_key]
+    
+    model_name = get_model_name(source_lang, target_lang)
+    if not model_name:
+        raise ValueError(f"Translation from {source_lang} to {target_lang} is not supported")
+    
+    return model_loader.wait(model_key, source_lang, target_lang, timeout=wait)
+
+def model_memory_bytes(model):
+    """Get the memory held by a model's weights"""
+    return sum(tensor.numel() * tensor.element_size()
+               for tensor in list(model.parameters()) + list(model.buffers()))
+
+def resident_model_bytes():
+    """Get the memory held by every cached model"""
+    return sum(model_memory_bytes(model) for _, model in list(model_cache.values()))
+
+def can_load_model(model_key):
+    """Check that a pair has a model and it fits in the memory budget"""
+    source_lang, target_lang = model_key.split('_')
+    if not get_model_name(source_lang, target_lang):
+        return False
+    if not MODEL_MEMORY_BUDGET_MB:
+        return True
+    
+    budget_bytes = MODEL_MEMORY_BUDGET_MB * 1024 * 1024
+    estimate_bytes = MODEL_SIZE_ESTIMATE_MB * 1024 * 1024
+    return resident_model_bytes() + estimate_bytes <= budget_bytes
+
+def available_system_memory_mb():
+    """Get the memory available to new allocations, or None if unknown"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+def engine_status():
+    """Report the models and load of the models held by this process"""
+    resident_mb = resident_model_bytes() // (1024 * 1024)
+    available_mb = available_system_memory_mb()
+    free_mb = available_mb
+    if MODEL_MEMORY_BUDGET_MB:
+        free_mb = MODEL_MEMORY_BUDGET_MB - resident_mb
+        if available_mb is not None:
+            free_mb = min(free_mb, available_mb)
+    
+    return {
+        'loaded_pairs': sorted(model_cache),
+        'pairs': inference_metrics.snapshot(),
+        'model_memory': {
+            'resident_mb': resident_mb,
+            'budget_mb': MODEL_MEMORY_BUDGET_MB or None,
+            'free_mb': free_mb
+        },
+        'compiled': dict(compile_status),
+        'loading': model_loader.status(),
+        'priority_classes': scheduler.stats()
+    }
+
+inference_metrics = InferenceMetrics()
+usage_tracker = UsageTracker(path=PREFETCH_USAGE_PATH)
+prefetcher = Prefetcher(
+    load_translation_model,
+    lambda model_key: model_key in model_cache,
+    can_load_model,
+    usage_tracker,
+    top_k=PREFETCH_TOP_K if PREFETCH_USAGE_PATH else 0,
+    interval=PREFETCH_INTERVAL
+)
+
+def start_usage_prefetch():
+    """Start preloading the busiest pairs by persisted usage, if configured"""
+    if prefetcher.top_k:
+        prefetcher.start()
+
+def placeholder_token_ids(tokenizer, spans):
+    """Get the target tokens needed to write the placeholders of `spans`"""
+    if not spans:
+        return set()
+    
+    markers = [f'[{index}]' for index in range(len(spans))]
+    # Placeholders appear both after a space and glued to neighbouring text
+    text = ' '.join(markers) + ' ' + ''.join(markers)
+    return set(tokenizer(text_target=text, add_special_tokens=False).input_ids)
+
+def get_shortlist(source_lang, target_lang):
+    """Get the vocabulary shortlist for a pair, or None if it has none"""
+    if not VOCAB_SHORTLIST:
+        return None
+    
+    model_key = f"{source_lang}_{target_lang}"
+    if model_key not in shortlist_cache:
+        shortlist_cache[model_key] = load_shortlist(model_key, SHORTLIST_DIR)
+        if shortlist_cache[model_key] is not None:
+            logger.info(f"Loaded vocabulary shortlist for {model_key}")
+    return shortlist_cache[model_key]
+
+def translate_text(text, source_lang, target_lang, timer=None, cancel_event=None, priority='interactive',
+                   load_wait=None):
+    """Translate text from source language to target language
+    
+    Setting `cancel_event` stops decoding at the next step and raises
+    TranslationCancelled. With `load_wait` set, a cold model that does not
+    load within that many seconds raises ModelLoading.
+    """
+    if timer is None:
+        timer = StageTimer()
+    model_key = f"{source_lang}_{target_lang}"
+    generate_kwargs = dict(GENERATE_KWARGS)
+    if cancel_event is not None:
+        generate_kwargs['stopping_criteria'] = cancellation_criteria(cancel_event)
+    
+    spans = []
+    if PROTECT_SPANS:
+        with timer.stage('preprocess'):
+            masked_text, spans = protect_spans(text)
+        
+        # Nothing left to translate, e.g. a bare URL: skip the model entirely
+        if not has_translatable_text(masked_text):
+            return text
+        text = masked_text
+    
+    # Only pairs with a model count towards the shared usage stats
+    if get_model_name(source_lang, target_lang):
+        usage_tracker.record(model_key)
+    
+    try:
+        with timer.stage('model_load'):
+            tokenizer, model = load_translation_model(source_lang, target_lang, wait=load_wait)
+            shortlist = get_shortlist(source_lang, target_lang)
+        
+        compiled = compile_status.get(model_key, {}).get('mode') == 'compiled'
+        
+        # Wait for an inference slot in the request's priority lane; load metrics
+        # cover the queue wait and inference, not the model load
+        with inference_metrics.track(model_key), scheduler.slot(priority, timer), \
+                profile_capture.capture(model_key):
+            if cancel_event is not None and cancel_event.is_set():
+                raise TranslationCancelled()
+            
+            # Tokenize input
+            with timer.stage('tokenize'):
+                inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
+                
+                # Pad to a warmed-up bucket so the compiled graphs are reused
+                bucket = bucket_for(inputs['input_ids'].shape[1], WARMUP_BUCKETS) if compiled else None
+                if bucket is not None:
+                    inputs = tokenizer(text, return_tensors="pt", padding='max_length', truncation=True,
+                                       max_length=bucket)
+                elif compiled:
+                    # Longer than every warmed bucket: run eager rather than compile on the request
+                    model = eager_view(model)
+                    compiled = False
+            
+            # Generate translation
+            with timer.stage('generate'), torch.no_grad():
+                if shortlist is not None:
+                    outputs = generate_with_shortlist(model, tokenizer, shortlist, inputs,
+                                                      required_ids=placeholder_token_ids(tokenizer, spans),
+                                                      **generate_kwargs)
+                elif compiled:
+                    try:
+                        outputs = model.generate(**inputs, **generate_kwargs)
+                    except Exception as e:
+                        logger.warning(f"Compiled generate failed for {model_key}, switching to eager: {str(e)}")
+                        restore_eager(model)
+                        compile_status[model_key].update({'mode': 'eager', 'error': str(e)})
+                        outputs = model.generate(**inputs, **generate_kwargs)
+                else:
+                    outputs = model.generate(**inputs, **generate_kwargs)
+            
+            if cancel_event is not None and cancel_event.is_set():
+                raise TranslationCancelled()
+            
+            # Decode output
+            with timer.stage('decode'):
+                translated_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
+                if spans:
+                    translated_text = restore_spans(translated_text, spans)
+        
+        return translated_text
+    except (TranslationCancelled, ModelLoading):
+        raise
+    except Exception as e:
+        logger.error(f"Translation error: {str(e)}")
+        raise
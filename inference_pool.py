@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Dedicated inference server for the Multilingual Translator
+
+Runs a fixed pool of model-holding processes. Every language pair is pinned
+to a small set of processes, so each model is resident once per replica
+instead of once per gunicorn worker. The HTTP workers in app.py forward
+translation requests to the owning process over a local socket.
+
+Usage:
+    python inference_pool.py            # start the pool
+    INFERENCE_SERVER=true gunicorn app:app ...
+"""
+
+import os
+import sys
+import logging
+import random
+import threading
+import time
+import uuid
+import zlib
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+from dotenv import load_dotenv
+from profiling import StageTimer
+from live_session import TranslationCancelled
+from model_loader import ModelLoading
+from languages import MODEL_NAMES
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_BASE_PORT = 6000
+
+
+def pool_settings():
+    """Read the pool layout shared by the server and its clients
+
+    Pool connections unpickle whatever they receive, so there is no default
+    secret: both sides refuse to start unless INFERENCE_AUTHKEY is set.
+    """
+    authkey = os.environ.get('INFERENCE_AUTHKEY')
+    if not authkey:
+        raise RuntimeError('INFERENCE_AUTHKEY must be set to run or connect to the inference pool')
+
+    num_workers = int(os.environ.get('INFERENCE_WORKERS', 0)) or os.cpu_count() or 1
+    replicas = int(os.environ.get('INFERENCE_REPLICAS', 1))
+    return {
+        'num_workers': num_workers,
+        'replicas': max(1, min(replicas, num_workers)),
+        'host': os.environ.get('INFERENCE_HOST', DEFAULT_HOST),
+        'base_port': int(os.environ.get('INFERENCE_BASE_PORT', DEFAULT_BASE_PORT)),
+        'authkey': authkey.encode(),
+    }
+
+
+def pair_worker_indices(source_lang, target_lang, num_workers, replicas=1):
+    """Get the pool processes that own a language pair
+
+    The assignment only depends on the pair and the pool size, so every HTTP
+    worker routes a given pair to the same processes.
+    """
+    model_key = f"{source_lang}_{target_lang}"
+    first = zlib.crc32(model_key.encode('utf-8')) % num_workers
+    return [(first + offset) % num_workers for offset in range(replicas)]
+
+
+# Cancellation events of the cancellable translations running in this process
+_active_requests = {}
+_active_requests_lock = threading.Lock()
+
+
+def _translate(engine, message):
+    """Translate for a client, registering the request so it can be cancelled"""
+    timer = StageTimer()
+    request_id = message.get('request_id')
+    cancel_event = None
+
+    if request_id is not None:
+        cancel_event = threading.Event()
+        with _active_requests_lock:
+            _active_requests[request_id] = cancel_event
+
+    try:
+        translated_text = engine.translate_text(
+            message['text'],
+            message['source_lang'],
+            message['target_lang'],
+            timer=timer,
+            cancel_event=cancel_event,
+            priority=message.get('priority', 'interactive'),
+            load_wait=message.get('load_wait')
+        )
+    finally:
+        if request_id is not None:
+            with _active_requests_lock:
+                _active_requests.pop(request_id, None)
+
+    return {'translated_text': translated_text, 'timings': timer.stages}
+
+
+def _handle_request(engine, message):
+    """Run a single request against the in-process translation engine"""
+    op = message.get('op')
+
+    if op == 'translate':
+        return _translate(engine, message)
+    if op == 'cancel':
+        with _active_requests_lock:
+            cancel_event = _active_requests.get(message['request_id'])
+        if cancel_event is not None:
+            cancel_event.set()
+        return None
+    if op == 'status':
+        return engine.engine_status()
+    if op == 'prefetch':
+        return engine.prefetcher.hint(message['source_lang'], message['target_lang'])
+    if op == 'profile':
+        model_key = f"{message['source_lang']}_{message['target_lang']}"
+        engine.profile_capture.arm(model_key, message['count'], message['mode'])
+        return None
+    if op == 'profile_status':
+        return engine.profile_capture.status()
+    if op == 'ping':
+        return 'pong'
+
+    raise ValueError(f'Unknown inference operation "{op}"')
+
+
+def _serve_connection(engine, conn):
+    """Answer requests from one HTTP worker until it disconnects"""
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            try:
+                result = _handle_request(engine, message)
+                response = {'ok': True, 'result': result}
+            except ModelLoading as e:
+                response = {'ok': False, 'error_type': 'ModelLoading', 'error': str(e),
+                            'model_key': e.model_key, 'progress': e.progress}
+            except TranslationCancelled:
+                response = {'ok': False, 'error_type': 'TranslationCancelled', 'error': 'Translation cancelled'}
+            except ValueError as e:
+                response = {'ok': False, 'error_type': 'ValueError', 'error': str(e)}
+            except Exception as e:
+                logger.error(f"Inference worker error: {str(e)}")
+                response = {'ok': False, 'error_type': 'Exception', 'error': str(e)}
+
+            conn.send(response)
+    finally:
+        conn.close()
+
+
+def _worker_main(index, address, authkey, num_threads, num_workers, replicas):
+    """Entry point of a single model-holding process"""
+    logging.basicConfig(level=logging.INFO)
+
+    import torch
+    torch.set_num_threads(num_threads)
+
+    import engine
+
+    # Only preload the busiest pairs that are routed to this process
+    engine.prefetcher.owns = lambda model_key: index in pair_worker_indices(
+        *model_key.split('_'), num_workers, replicas)
+    engine.start_usage_prefetch()
+
+    listener = Listener(address, authkey=authkey)
+    logger.info(f"Inference worker {index} listening on {address[0]}:{address[1]} "
+                f"with {num_threads} threads")
+
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=_serve_connection, args=(engine, conn), daemon=True).start()
+
+
+class InferencePool:
+    """A fixed set of model-holding processes sized to the available cores"""
+
+    def __init__(self, num_workers, authkey, host=DEFAULT_HOST, base_port=DEFAULT_BASE_PORT, replicas=1):
+        self.num_workers = num_workers
+        self.replicas = replicas
+        self.addresses = [(host, base_port + index) for index in range(num_workers)]
+        self.authkey = authkey
+        self.processes = []
+        self._context = None
+        self._num_threads = 1
+        self._started_at = []
+        self._restart_delays = []
+        self._stopping = threading.Event()
+
+    def _spawn(self, index):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.addresses[index], self.authkey, self._num_threads,
+                  self.num_workers, self.replicas),
+            name=f'inference-worker-{index}',
+            daemon=True
+        )
+        process.start()
+        self._started_at[index] = time.monotonic()
+        return process
+
+    def start(self):
+        """Spawn one process per pool slot"""
+        # Spawn rather than fork so no torch or tokenizer state is inherited
+        self._context = multiprocessing.get_context('spawn')
+        self._num_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+        self._started_at = [0.0] * self.num_workers
+        self._restart_delays = [0.0] * self.num_workers
+
+        self.processes = [self._spawn(index) for index in range(self.num_workers)]
+
+    def monitor(self, interval=1.0, max_restart_delay=60.0):
+        """Respawn workers that exit, on the same address, until the pool is stopped
+
+        A worker that dies soon after starting is restarted with exponential
+        backoff so a crash loop does not spin.
+        """
+        next_restart = [None] * self.num_workers
+
+        while not self._stopping.wait(interval):
+            for index, process in enumerate(self.processes):
+                if process.is_alive():
+                    continue
+
+                now = time.monotonic()
+                if next_restart[index] is None:
+                    uptime = now - self._started_at[index]
+                    delay = self._restart_delays[index]
+                    delay = 0.0 if uptime > max_restart_delay else min(max_restart_delay, max(1.0, delay * 2))
+                    self._restart_delays[index] = delay
+                    next_restart[index] = now + delay
+                    logger.warning(f"Inference worker {index} exited with code {process.exitcode}, "
+                                   f"restarting in {delay:.0f}s")
+
+                if now >= next_restart[index]:
+                    next_restart[index] = None
+                    self.processes[index] = self._spawn(index)
+
+    def join(self):
+        """Block until every worker process exits"""
+        for process in self.processes:
+            process.join()
+
+    def stop(self):
+        """Stop supervising and terminate all worker processes"""
+        self._stopping.set()
+        for process in self.processes:
+            process.terminate()
+        self.join()
+
+
+class InferenceClient:
+    """Forwards translation requests from an HTTP worker to the pool"""
+
+    def __init__(self, addresses, authkey, replicas=1):
+        self.addresses = addresses
+        self.authkey = authkey
+        self.replicas = replicas
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls):
+        """Build a client for the pool described by the environment"""
+        settings = pool_settings()
+        addresses = [(settings['host'], settings['base_port'] + index)
+                     for index in range(settings['num_workers'])]
+        return cls(addresses, settings['authkey'], settings['replicas'])
+
+    def _connections(self):
+        if not hasattr(self._local, 'connections'):
+            self._local.connections = {}
+        return self._local.connections
+
+    def _call(self, index, message, cancel_event=None):
+        """Send a request to a pool process, reconnecting once if needed"""
+        connections = self._connections()
+
+        for attempt in range(2):
+            conn = connections.get(index)
+            try:
+                if conn is None:
+                    conn = Client(self.addresses[index], authkey=self.authkey)
+                    connections[index] = conn
+                conn.send(message)
+                if cancel_event is not None:
+                    self._wait_cancellable(index, conn, message['request_id'], cancel_event)
+                response = conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                connections.pop(index, None)
+                if attempt == 1:
+                    raise RuntimeError(f'Inference worker {index} is unavailable: {str(e)}')
+
+        if response['ok']:
+            return response['result']
+        if response['error_type'] == 'ValueError':
+            raise ValueError(response['error'])
+        if response['error_type'] == 'TranslationCancelled':
+            raise TranslationCancelled()
+        if response['error_type'] == 'ModelLoading':
+            raise ModelLoading(response['model_key'], response['progress'])
+        raise RuntimeError(response['error'])
+
+    def _wait_cancellable(self, index, conn, request_id, cancel_event):
+        """Wait for a response, asking the pool to cancel once the event is set"""
+        cancel_sent = False
+        while not conn.poll(0.05):
+            if cancel_event.is_set() and not cancel_sent:
+                # The request connection is busy, so cancel over a separate one
+                with Client(self.addresses[index], authkey=self.authkey) as cancel_conn:
+                    cancel_conn.send({'op': 'cancel', 'request_id': request_id})
+                    cancel_conn.recv()
+                cancel_sent = True
+
+    def worker_for(self, source_lang, target_lang):
+        """Pick one of the pool processes that own the pair"""
+        return random.choice(self.owners(source_lang, target_lang))
+
+    def owners(self, source_lang, target_lang):
+        """Get every pool process that owns the pair"""
+        return pair_worker_indices(source_lang, target_lang, len(self.addresses), self.replicas)
+
+    def translate(self, text, source_lang, target_lang, timer=None, cancel_event=None, priority='interactive',
+                  load_wait=None):
+        """Translate text on the pool process that owns the pair"""
+        index = self.worker_for(source_lang, target_lang)
+        message = {
+            'op': 'translate',
+            'text': text,
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'priority': priority,
+            'load_wait': load_wait
+        }
+        if cancel_event is not None:
+            message['request_id'] = uuid.uuid4().hex
+
+        response = self._call(index, message, cancel_event=cancel_event)
+        if timer is not None:
+            timer.merge(response['timings'])
+        return response['translated_text']
+
+    def prefetch(self, source_lang, target_lang):
+        """Hint the processes that own a pair to load its model"""
+        statuses = [self._call(index, {
+            'op': 'prefetch',
+            'source_lang': source_lang,
+            'target_lang': target_lang
+        }) for index in self.owners(source_lang, target_lang)]
+        return 'queued' if 'queued' in statuses else statuses[0]
+
+    def status(self):
+        """Combine the loaded pairs, load and memory of every pool process
+
+        Processes that do not answer, e.g. while being respawned, are listed
+        under `unavailable_workers`, and pairs served only by them under
+        `unavailable_pairs`. Raises RuntimeError if no process answers.
+        """
+        combined = {'loaded_pairs': set(), 'pairs': {}, 'compiled': {}, 'priority_classes': {}, 'loading': {}}
+        resident_mb = budget_mb = budgeted_free_mb = 0
+        system_free_mb = None
+        unavailable = []
+
+        for index in range(len(self.addresses)):
+            try:
+                status = self._call(index, {'op': 'status'})
+            except RuntimeError as e:
+                logger.warning(f"Leaving inference worker {index} out of the status report: {str(e)}")
+                unavailable.append(index)
+                continue
+            combined['loaded_pairs'].update(status['loaded_pairs'])
+            combined['compiled'].update(status['compiled'])
+            combined['loading'].update(status['loading'])
+
+            for model_key, stats in status['pairs'].items():
+                merged = combined['pairs'].get(model_key)
+                if merged is None:
+                    combined['pairs'][model_key] = dict(stats)
+                    continue
+                merged['queue_depth'] += stats['queue_depth']
+                merged['completed'] += stats['completed']
+                for field in ('p50_ms', 'p95_ms'):
+                    merged[field] = max(filter(None, (merged[field], stats[field])), default=None)
+
+            for priority, stats in status['priority_classes'].items():
+                merged = combined['priority_classes'].get(priority)
+                if merged is None:
+                    combined['priority_classes'][priority] = dict(stats)
+                    continue
+                merged['queued'] += stats['queued']
+                merged['scheduled'] += stats['scheduled']
+                for field in ('wait_p50_ms', 'wait_p95_ms'):
+                    merged[field] = max(filter(None, (merged[field], stats[field])), default=None)
+
+            memory = status['model_memory']
+            resident_mb += memory['resident_mb']
+            if memory['budget_mb']:
+                budget_mb += memory['budget_mb']
+                budgeted_free_mb += memory['free_mb']
+            else:
+                # Without budgets every process reports the same host memory
+                system_free_mb = memory['free_mb']
+
+        if len(unavailable) == len(self.addresses):
+            raise RuntimeError('No inference worker is available')
+
+        combined['loaded_pairs'] = sorted(combined['loaded_pairs'])
+        combined['unavailable_workers'] = unavailable
+        combined['unavailable_pairs'] = sorted(
+            f"{source_lang}_{target_lang}" for source_lang, target_lang in MODEL_NAMES
+            if set(self.owners(source_lang, target_lang)) <= set(unavailable)
+        )
+        combined['model_memory'] = {
+            'resident_mb': resident_mb,
+            'budget_mb': budget_mb or None,
+            'free_mb': budgeted_free_mb if budget_mb else system_free_mb
+        }
+        return combined
+
+    def arm_profile(self, source_lang, target_lang, count, mode):
+        """Profile the next requests for a pair on each process that owns it"""
+        for index in self.owners(source_lang, target_lang):
+            self._call(index, {
+                'op': 'profile',
+                'source_lang': source_lang,
+                'target_lang': target_lang,
+                'count': count,
+                'mode': mode
+            })
+
+    def profile_status(self):
+        """Collect armed pairs and saved profiles from every pool process"""
+        status = {'pending': {}, 'saved': []}
+        for index in range(len(self.addresses)):
+            worker_status = self._call(index, {'op': 'profile_status'})
+            status['pending'].update(worker_status['pending'])
+            status['saved'].extend(worker_status['saved'])
+        return status
+
+
+def main():
+    """Start the inference pool and keep its workers running"""
+    logging.basicConfig(level=logging.INFO)
+    try:
+        settings = pool_settings()
+    except RuntimeError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    pool = InferencePool(
+        settings['num_workers'],
+        settings['authkey'],
+        host=settings['host'],
+        base_port=settings['base_port'],
+        replicas=settings['replicas']
+    )
+    logger.info(f"Starting inference pool with {settings['num_workers']} workers "
+                f"and {settings['replicas']} replica(s) per pair")
+    pool.start()
+
+    try:
+        pool.monitor()
+    except KeyboardInterrupt:
+        logger.info("Stopping inference pool")
+        pool.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Language pair to model mapping for the Multilingual Translator
+
+Kept free of torch and transformers so the HTTP workers can validate pairs
+without loading the inference stack.
+"""
+
+# Hugging Face model for every supported (source, target) pair
+MODEL_NAMES = {
+    ('en', 'es'): 'Helsinki-NLP/opus-mt-en-es',
+    ('es', 'en'): 'Helsinki-NLP/opus-mt-es-en',
+    ('en', 'fr'): 'Helsinki-NLP/opus-mt-en-fr',
+    ('fr', 'en'): 'Helsinki-NLP/opus-mt-fr-en',
+    ('en', 'de'): 'Helsinki-NLP/opus-mt-en-de',
+    ('de', 'en'): 'Helsinki-NLP/opus-mt-de-en',
+    ('en', 'it'): 'Helsinki-NLP/opus-mt-en-it',
+    ('it', 'en'): 'Helsinki-NLP/opus-mt-it-en',
+    ('en', 'pt'): 'Helsinki-NLP/opus-mt-en-pt',
+    ('pt', 'en'): 'Helsinki-NLP/opus-mt-pt-en',
+    ('en', 'ru'): 'Helsinki-NLP/opus-mt-en-ru',
+    ('ru', 'en'): 'Helsinki-NLP/opus-mt-ru-en',
+    ('en', 'ja'): 'Helsinki-NLP/opus-mt-en-jap',
+    ('ja', 'en'): 'Helsinki-NLP/opus-mt-jap-en',
+    ('en', 'ko'): 'Helsinki-NLP/opus-mt-en-ko',
+    ('ko', 'en'): 'Helsinki-NLP/opus-mt-ko-en',
+    ('en', 'zh'): 'Helsinki-NLP/opus-mt-en-zh',
+    ('zh', 'en'): 'Helsinki-NLP/opus-mt-zh-en',
+    ('en', 'ar'): 'Helsinki-NLP/opus-mt-en-ar',
+    ('ar', 'en'): 'Helsinki-NLP/opus-mt-ar-en',
+    ('en', 'hi'): 'Helsinki-NLP/opus-mt-en-hi',
+    ('hi', 'en'): 'Helsinki-NLP/opus-mt-hi-en',
+}
+
+
+def get_model_name(source_lang, target_lang):
+    """Get the Hugging Face model name for the language pair"""
+    return MODEL_NAMES.get((source_lang, target_lang))
@@ -0,0 +1,83 @@
+"""
+Live translation sessions for the Multilingual Translator
+
+A session belongs to one editor connection. Only its latest text matters, so
+submitting new text cancels the translation still in flight, mid-decode, and
+only the result for the newest text is sent back.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationCancelled(Exception):
+    """Raised when a translation is superseded before it finishes"""
+
+
+class LiveTranslationSession:
+    """Translates the latest text of one editor, dropping superseded requests"""
+
+    def __init__(self, send, translate):
+        self.send = send
+        self.translate = translate
+        self._condition = threading.Condition()
+        self._pending = None
+        self._cancel_event = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, request_id, text, source_lang, target_lang):
+        """Queue new text, cancelling whatever is being translated"""
+        with self._condition:
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+            self._pending = (request_id, text, source_lang, target_lang)
+            self._condition.notify()
+
+    def close(self):
+        """Cancel in-flight work and stop the session thread"""
+        with self._condition:
+            self._closed = True
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+            self._condition.notify()
+
+    def _next_request(self):
+        with self._condition:
+            while self._pending is None and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return None, None
+
+            pending, self._pending = self._pending, None
+            self._cancel_event = threading.Event()
+            return pending, self._cancel_event
+
+    def _run(self):
+        while True:
+            pending, cancel_event = self._next_request()
+            if pending is None:
+                return
+
+            request_id, text, source_lang, target_lang = pending
+            try:
+                translated_text = self.translate(text, source_lang, target_lang, cancel_event=cancel_event)
+                if cancel_event.is_set():
+                    continue
+                self.send({
+                    'id': request_id,
+                    'success': True,
+                    'translated_text': translated_text,
+                    'source_lang': source_lang,
+                    'target_lang': target_lang
+                })
+            except TranslationCancelled:
+                continue
+            except ValueError as e:
+                self.send({'id': request_id, 'success': False, 'error': str(e)})
+            except Exception as e:
+                logger.error(f"Live translation error: {str(e)}")
+                self.send({'id': request_id, 'success': False, 'error': 'Internal server error'})
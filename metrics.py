@@ -0,0 +1,71 @@
+"""
+Load metrics for the Multilingual Translator
+
+Tracks in-flight requests and recent latency per language pair so a node
+can report how busy each of its models is.
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class InferenceMetrics:
+    """Per-pair queue depth and rolling latency window"""
+
+    def __init__(self, window=100):
+        self.window = window
+        self._in_flight = {}
+        self._latencies = {}
+        self._completed = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, model_key):
+        """Count the enclosed block as an in-flight request for the pair
+
+        Only blocks that finish without raising are added to the latency
+        window, so cancelled and failed requests do not skew it.
+        """
+        with self._lock:
+            self._in_flight[model_key] = self._in_flight.get(model_key, 0) + 1
+
+        started = time.perf_counter()
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._in_flight[model_key] -= 1
+                if succeeded:
+                    self._latencies.setdefault(model_key, deque(maxlen=self.window)).append(elapsed_ms)
+                    self._completed[model_key] = self._completed.get(model_key, 0) + 1
+
+    def snapshot(self):
+        """Get queue depth and latency percentiles for every pair seen"""
+        with self._lock:
+            keys = set(self._in_flight) | set(self._latencies)
+            pairs = {}
+            for key in keys:
+                latencies = list(self._latencies.get(key, ()))
+                p50 = percentile(latencies, 0.5)
+                p95 = percentile(latencies, 0.95)
+                pairs[key] = {
+                    'queue_depth': self._in_flight.get(key, 0),
+                    'completed': self._completed.get(key, 0),
+                    'p50_ms': round(p50, 2) if p50 is not None else None,
+                    'p95_ms': round(p95, 2) if p95 is not None else None
+                }
+            return pairs
@@ -0,0 +1,125 @@
+"""
+Background model loading for the Multilingual Translator
+
+Cold models are loaded on a small dedicated thread pool instead of on the
+request thread. Requests for a pair that is still loading can wait a bounded
+time and otherwise get its load progress back, so the server can answer
+503 with Retry-After rather than hold the request until the load finishes.
+"""
+
+import math
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Rough share of a load finished once each phase starts
+PHASE_PROGRESS = {'queued': 0.0, 'tokenizer': 0.05, 'model': 0.1, 'compiling': 0.8, 'ready': 1.0}
+
+
+class ModelLoading(Exception):
+    """Raised when a model is not ready within the allowed wait"""
+
+    def __init__(self, model_key, progress):
+        super().__init__(f"Model {model_key} is still loading")
+        self.model_key = model_key
+        self.progress = progress
+
+    @property
+    def retry_after(self):
+        """Seconds a client should wait before retrying"""
+        remaining = self.progress.get('estimated_seconds_remaining') or 1
+        return max(1, min(30, math.ceil(remaining)))
+
+
+class ModelLoader:
+    """Loads models on a bounded pool of loader threads"""
+
+    def __init__(self, load, max_concurrent=1):
+        self.load = load
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrent),
+                                            thread_name_prefix='model-loader')
+        self._loads = {}
+        self._durations = []
+        self._lock = threading.Lock()
+
+    def request(self, model_key, source_lang, target_lang):
+        """Start loading a model unless it is already queued or loading"""
+        with self._lock:
+            entry = self._loads.get(model_key)
+            if entry is not None and entry['state'] in ('queued', 'loading', 'ready'):
+                return entry['future']
+
+            entry = {'state': 'queued', 'phase': 'queued', 'queued_at': time.monotonic(),
+                     'started_at': None, 'error': None}
+            self._loads[model_key] = entry
+            entry['future'] = self._executor.submit(self._run, model_key, source_lang, target_lang)
+            return entry['future']
+
+    def wait(self, model_key, source_lang, target_lang, timeout=None):
+        """Get the loaded model, waiting at most `timeout` seconds
+
+        Raises ModelLoading with the load progress if it is not ready in time.
+        """
+        future = self.request(model_key, source_lang, target_lang)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise ModelLoading(model_key, self.progress(model_key))
+
+    def _set_phase(self, model_key, phase):
+        with self._lock:
+            self._loads[model_key]['phase'] = phase
+
+    def _run(self, model_key, source_lang, target_lang):
+        with self._lock:
+            entry = self._loads[model_key]
+            entry['state'] = 'loading'
+            entry['started_at'] = time.monotonic()
+
+        try:
+            result = self.load(source_lang, target_lang, lambda phase: self._set_phase(model_key, phase))
+        except Exception as e:
+            with self._lock:
+                entry.update({'state': 'failed', 'error': str(e)})
+            raise
+
+        with self._lock:
+            entry.update({'state': 'ready', 'phase': 'ready'})
+            self._durations = (self._durations + [time.monotonic() - entry['started_at']])[-10:]
+        return result
+
+    def progress(self, model_key):
+        """Get the state, phase and estimated remaining time of a load"""
+        with self._lock:
+            entry = self._loads.get(model_key)
+            if entry is None:
+                return {'state': 'not_loaded'}
+
+            now = time.monotonic()
+            expected = sum(self._durations) / len(self._durations) if self._durations else None
+            progress = {
+                'state': entry['state'],
+                'phase': entry['phase'],
+                'progress': PHASE_PROGRESS.get(entry['phase'], 0.0),
+                'elapsed_seconds': round(now - entry['queued_at'], 1),
+                'estimated_seconds_remaining': None
+            }
+            if entry['error']:
+                progress['error'] = entry['error']
+
+            if expected is not None and entry['state'] in ('queued', 'loading'):
+                loading_for = now - entry['started_at'] if entry['started_at'] else 0
+                progress['estimated_seconds_remaining'] = round(max(1.0, expected - loading_for), 1)
+                if entry['state'] == 'loading':
+                    progress['progress'] = max(progress['progress'], min(0.95, loading_for / expected))
+            progress['progress'] = round(progress['progress'], 2)
+            return progress
+
+    def status(self):
+        """Get the progress of every load that has not finished"""
+        with self._lock:
+            keys = [key for key, entry in self._loads.items() if entry['state'] in ('queued', 'loading')]
+        return {key: self.progress(key) for key in keys}
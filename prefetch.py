@@ -0,0 +1,165 @@
+"""
+Predictive model prefetching for the Multilingual Translator
+
+Cold model loads are moved off the request path in two ways: the front end
+hints which pair the user is about to translate, and a usage tracker
+preloads the busiest pairs in the background. Usage is persisted to a file
+shared by every worker, so a restarted or newly started process preloads
+the pairs the rest of the deployment has been serving. Both stay within the
+model memory budget.
+"""
+
+import os
+import json
+import math
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class UsageTracker:
+    """Exponentially decayed request counts per language pair
+
+    With a `path`, counts are loaded from that file at startup and merged
+    with it on every sync, so processes sharing the file see each other's
+    traffic.
+    """
+
+    def __init__(self, half_life_seconds=3600, path=None):
+        self.decay_rate = math.log(2) / half_life_seconds
+        self.path = path
+        self._scores = {}
+        self._lock = threading.Lock()
+        if path:
+            self.sync()
+
+    def _decayed(self, score, updated, now):
+        return score * math.exp(-self.decay_rate * (now - updated))
+
+    def record(self, model_key):
+        """Count one request for a pair"""
+        now = time.time()
+        with self._lock:
+            score, updated = self._scores.get(model_key, (0.0, now))
+            self._scores[model_key] = (self._decayed(score, updated, now) + 1, now)
+
+    def top(self, k=None):
+        """Get the k pairs with the most recent traffic, or all of them by traffic"""
+        now = time.time()
+        with self._lock:
+            scores = {key: self._decayed(score, updated, now)
+                      for key, (score, updated) in self._scores.items()}
+        return sorted(scores, key=scores.get, reverse=True)[:k]
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return {key: tuple(value) for key, value in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read usage stats from {self.path}: {str(e)}")
+            return {}
+
+    def sync(self):
+        """Merge counts with the usage file and write the result back
+
+        Each pair keeps the larger of the two decayed counts, so repeated
+        syncs between processes never inflate them.
+        """
+        if not self.path:
+            return
+
+        now = time.time()
+        stored = self._read()
+        with self._lock:
+            for key, (score, updated) in stored.items():
+                own = self._scores.get(key)
+                if own is None or self._decayed(*own, now) < self._decayed(score, updated, now):
+                    self._scores[key] = (score, updated)
+            data = {key: [score, updated] for key, (score, updated) in self._scores.items()}
+
+        # Write a private file and rename it so readers never see a partial one
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write usage stats to {self.path}: {str(e)}")
+
+
+class Prefetcher:
+    """Loads hinted and popular pairs on a background thread"""
+
+    def __init__(self, load, is_loaded, can_load, tracker, top_k=3, interval=30, owns=None):
+        self.load = load
+        self.is_loaded = is_loaded
+        self.can_load = can_load
+        self.tracker = tracker
+        # Restricts the usage scan to pairs this process serves, e.g. in the inference pool
+        self.owns = owns
+        self.top_k = top_k
+        self.interval = interval
+        self._hints = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the background thread, once per process"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='model-prefetcher', daemon=True)
+                self._thread.start()
+
+    def hint(self, source_lang, target_lang):
+        """Ask for a pair to be loaded soon; returns 'loaded', 'queued' or 'skipped'"""
+        model_key = f"{source_lang}_{target_lang}"
+        if self.is_loaded(model_key):
+            return 'loaded'
+        if not self.can_load(model_key):
+            return 'skipped'
+
+        self.start()
+        self._hints.put(model_key)
+        return 'queued'
+
+    def _prefetch(self, model_key):
+        if self.is_loaded(model_key) or not self.can_load(model_key):
+            return
+
+        source_lang, target_lang = model_key.split('_')
+        try:
+            started = time.perf_counter()
+            self.load(source_lang, target_lang)
+            logger.info(f"Prefetched model {model_key} in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            logger.warning(f"Prefetch of {model_key} failed: {str(e)}")
+
+    def _scan(self):
+        self.tracker.sync()
+        # Pairs that cannot be loaded here must not use up one of the K slots
+        candidates = [model_key for model_key in self.tracker.top()
+                      if (self.owns is None or self.owns(model_key))
+                      and (self.is_loaded(model_key) or self.can_load(model_key))]
+        for model_key in candidates[:self.top_k]:
+            self._prefetch(model_key)
+
+    def _run(self):
+        # Scan right away so a fresh process preloads the busiest pairs
+        next_scan = time.monotonic()
+        while True:
+            timeout = max(0.0, next_scan - time.monotonic()) if self.top_k else None
+            try:
+                model_key = self._hints.get(timeout=timeout)
+                self._prefetch(model_key)
+                continue
+            except queue.Empty:
+                pass
+
+            # Hints take priority; the usage scan runs once the queue is idle
+            self._scan()
+            next_scan = time.monotonic() + self.interval
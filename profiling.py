@@ -0,0 +1,125 @@
+"""
+Request instrumentation for the Multilingual Translator
+
+StageTimer records how long each stage of a translation takes so it can be
+returned as a Server-Timing header. ProfileCapture profiles the next N
+requests for a language pair and saves the results to disk.
+"""
+
+import os
+import time
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'torch')
+
+
+class StageTimer:
+    """Wall-clock durations of the stages of one request, in milliseconds"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as the given stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name, duration_ms):
+        """Add a duration to a stage"""
+        self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+
+    def merge(self, stages):
+        """Add the stages timed in another process"""
+        for name, duration_ms in stages.items():
+            self.record(name, duration_ms)
+
+    def as_dict(self):
+        """Get the stage durations rounded for JSON output"""
+        return {name: round(duration_ms, 2) for name, duration_ms in self.stages.items()}
+
+    def header_value(self):
+        """Format the stages as a Server-Timing header value"""
+        return ', '.join(f'{name};dur={duration_ms:.2f}' for name, duration_ms in self.stages.items())
+
+
+class ProfileCapture:
+    """Profiles the next N translations of armed language pairs"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self._pending = {}
+        self._saved = []
+        self._lock = threading.Lock()
+
+    def arm(self, model_key, count, mode='cprofile'):
+        """Profile the next `count` requests for a pair"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'Profile mode "{mode}" is not supported')
+        if count < 1:
+            raise ValueError('Profile count must be at least 1')
+
+        with self._lock:
+            self._pending[model_key] = {'remaining': count, 'mode': mode}
+
+    def status(self):
+        """Get armed pairs and the most recently saved profiles"""
+        with self._lock:
+            return {
+                'pending': {key: dict(entry) for key, entry in self._pending.items()},
+                'saved': list(self._saved)
+            }
+
+    def _take(self, model_key):
+        with self._lock:
+            entry = self._pending.get(model_key)
+            if not entry:
+                return None
+            entry['remaining'] -= 1
+            if entry['remaining'] <= 0:
+                del self._pending[model_key]
+            return entry['mode']
+
+    def _output_path(self, model_key, extension):
+        os.makedirs(self.output_dir, exist_ok=True)
+        filename = f"{model_key}_{time.strftime('%Y%m%d-%H%M%S')}_{time.time_ns() % 1000000:06d}.{extension}"
+        return os.path.join(self.output_dir, filename)
+
+    def _saved_profile(self, path):
+        logger.info(f"Saved profile: {path}")
+        with self._lock:
+            self._saved = (self._saved + [path])[-20:]
+
+    @contextmanager
+    def capture(self, model_key):
+        """Profile the enclosed block if the pair is armed"""
+        mode = self._take(model_key)
+
+        if mode is None:
+            yield
+        elif mode == 'torch':
+            from torch.profiler import profile, ProfilerActivity
+
+            path = self._output_path(model_key, 'json')
+            with profile(activities=[ProfilerActivity.CPU], record_shapes=True) as prof:
+                yield
+            prof.export_chrome_trace(path)
+            self._saved_profile(path)
+        else:
+            path = self._output_path(model_key, 'prof')
+            prof = cProfile.Profile()
+            prof.enable()
+            try:
+                yield
+            finally:
+                prof.disable()
+                prof.dump_stats(path)
+                self._saved_profile(path)
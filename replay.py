@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Replay captured traffic against a Multilingual Translator server
+
+Plays a capture written with TRAFFIC_CAPTURE_PATH back at its original pace,
+or scaled, and reports latency percentiles and throughput. Given a baseline,
+exits nonzero when any of them, or the error or loading rate, regresses.
+
+Usage:
+    python replay.py --capture traffic.jsonl --save-baseline baseline.json
+    python replay.py --capture traffic.jsonl --baseline baseline.json --rate-scale 2
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from metrics import percentile
+
+FILLER_WORDS = ('the', 'quick', 'brown', 'fox', 'jumps', 'over', 'a', 'lazy', 'dog',
+                'while', 'people', 'read', 'their', 'morning', 'news', 'at', 'home')
+
+
+def synthetic_text(length):
+    """Build filler text of about `length` characters for text-less captures"""
+    words = []
+    size = 0
+    while size < length:
+        word = FILLER_WORDS[len(words) % len(FILLER_WORDS)]
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)[:max(1, length)]
+
+
+def load_capture(path, limit=None):
+    """Read captured requests in arrival order"""
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+    entries.sort(key=lambda entry: entry['timestamp'])
+    return entries[:limit] if limit else entries
+
+
+def send(target, entry, scheduled_at, wait_seconds):
+    """Replay one request and time it from when it was due to be sent
+
+    Timing from the scheduled send time rather than from when a thread picks
+    the request up keeps client-side queueing in the latency once the
+    target falls behind. Returns the outcome ('ok', 'loading' for a 503
+    while the model loads, or 'error') and the latency in milliseconds.
+    """
+    payload = {
+        'text': entry.get('text') or synthetic_text(entry['length']),
+        'source_lang': entry['source_lang'],
+        'target_lang': entry['target_lang'],
+        'priority': entry.get('priority', 'interactive'),
+        'wait_seconds': wait_seconds
+    }
+
+    try:
+        response = requests.post(f"{target}/api/translate", json=payload, timeout=wait_seconds + 130)
+        if response.status_code == 200:
+            outcome = 'ok'
+        elif response.status_code == 503:
+            outcome = 'loading'
+        else:
+            outcome = 'error'
+    except requests.RequestException:
+        outcome = 'error'
+    return outcome, (time.monotonic() - scheduled_at) * 1000
+
+
+def replay(entries, target, rate_scale=1.0, workers=32, wait_seconds=60):
+    """Send every entry at its scaled arrival offset and summarize the run
+
+    Cold-model 503s are reported as `loading_rate`, apart from errors.
+    """
+    results = []
+    results_lock = threading.Lock()
+
+    def run(entry, scheduled_at):
+        result = send(target, entry, scheduled_at, wait_seconds)
+        with results_lock:
+            results.append(result)
+
+    first = entries[0]['timestamp']
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for entry in entries:
+            scheduled_at = started + (entry['timestamp'] - first) / rate_scale
+            delay = scheduled_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(run, entry, scheduled_at)
+    elapsed = time.monotonic() - started
+
+    latencies = [latency for outcome, latency in results if outcome == 'ok']
+    loading = sum(1 for outcome, _ in results if outcome == 'loading')
+    errors = sum(1 for outcome, _ in results if outcome == 'error')
+    return {
+        'requests': len(results),
+        'error_rate': round(errors / len(results), 4),
+        'loading_rate': round(loading / len(results), 4),
+        'throughput_rps': round(len(latencies) / elapsed, 3),
+        'p50_ms': round(percentile(latencies, 0.5) or 0, 2),
+        'p95_ms': round(percentile(latencies, 0.95) or 0, 2),
+        'p99_ms': round(percentile(latencies, 0.99) or 0, 2)
+    }
+
+
+def find_regressions(summary, baseline, threshold, rate_tolerance):
+    """Get human-readable descriptions of metrics worse than the baseline
+
+    Latencies and throughput regress when they are more than `threshold`
+    (a fraction) worse than the baseline. Error and loading rates regress
+    when they exceed the baseline by more than `rate_tolerance`, an absolute
+    fraction of requests, since a relative rule is meaningless from 0%.
+    """
+    regressions = []
+
+    for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+        if baseline.get(metric) and summary[metric] > baseline[metric] * (1 + threshold):
+            regressions.append(f"{metric} {summary[metric]} vs baseline {baseline[metric]}")
+
+    if baseline.get('throughput_rps') and summary['throughput_rps'] < baseline['throughput_rps'] * (1 - threshold):
+        regressions.append(f"throughput_rps {summary['throughput_rps']} vs baseline {baseline['throughput_rps']}")
+
+    for metric in ('error_rate', 'loading_rate'):
+        if summary[metric] > baseline.get(metric, 0) + rate_tolerance:
+            regressions.append(f"{metric} {summary[metric]} vs baseline {baseline.get(metric, 0)}")
+
+    return regressions
+
+
+def main():
+    """Replay a capture and compare it with a stored baseline"""
+    parser = argparse.ArgumentParser(description='Replay captured translation traffic')
+    parser.add_argument('--capture', required=True, help='JSONL capture written by the server')
+    parser.add_argument('--target', default='http://localhost:5000', help='Server to replay against')
+    parser.add_argument('--rate-scale', type=float, default=1.0, help='Speed-up over the captured rate')
+    parser.add_argument('--limit', type=int, help='Maximum requests to replay')
+    parser.add_argument('--workers', type=int, default=32, help='Maximum concurrent requests')
+    parser.add_argument('--wait-seconds', type=float, default=60,
+                        help='How long each request may wait for a cold model (capped by MAX_MODEL_LOAD_WAIT)')
+    parser.add_argument('--baseline', help='Baseline summary to compare against')
+    parser.add_argument('--save-baseline', help='Write this run as the new baseline')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Allowed latency and throughput regression in percent')
+    parser.add_argument('--rate-tolerance', type=float, default=1.0,
+                        help='Allowed rise in error and loading rates in percentage points')
+    args = parser.parse_args()
+
+    entries = load_capture(args.capture, args.limit)
+    if not entries:
+        print(f"❌ No requests found in {args.capture}")
+        sys.exit(1)
+
+    print(f"🚀 Replaying {len(entries)} requests against {args.target} at {args.rate_scale}x")
+    print("=" * 50)
+
+    summary = replay(entries, args.target.rstrip('/'), args.rate_scale, args.workers, args.wait_seconds)
+    for metric, value in summary.items():
+        print(f"{metric:>15}: {value}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"✅ Saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        regressions = find_regressions(summary, baseline, args.threshold / 100, args.rate_tolerance / 100)
+        print("\n" + "=" * 50)
+        if regressions:
+            for regression in regressions:
+                print(f"❌ Regression: {regression}")
+            sys.exit(1)
+        print(f"🎉 No regressions above {args.threshold}% or {args.rate_tolerance} points against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
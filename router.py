@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Model-affinity router for a fleet of Multilingual Translator nodes
+
+Polls each node's /health/ready and sends every translation to a node that
+already has the pair's model warm, picking the least busy one. Cold pairs
+are spread by rendezvous hashing, so each pair tends to be loaded on one
+node instead of on every node that happens to see it.
+
+Usage:
+    ROUTER_NODES=http://10.0.0.1:5000,http://10.0.0.2:5000 python router.py
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+import requests
+from flask import Flask, request, jsonify, Response
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rendezvous_score(node, model_key):
+    """Stable per-(node, pair) weight for rendezvous hashing"""
+    return hashlib.sha1(f"{node}|{model_key}".encode('utf-8')).hexdigest()
+
+
+class NodeDirectory:
+    """Latest readiness report of every node in the fleet"""
+
+    def __init__(self, nodes, interval=5, timeout=2):
+        self.nodes = nodes
+        self.interval = interval
+        self.timeout = timeout
+        self._reports = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Poll every node once; unreachable nodes drop out of routing"""
+        for node in self.nodes:
+            try:
+                response = requests.get(f"{node}/health/ready", timeout=self.timeout)
+                response.raise_for_status()
+                report = response.json()
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(f"Node {node} is not ready: {str(e)}")
+                report = None
+
+            with self._lock:
+                if report is None:
+                    self._reports.pop(node, None)
+                else:
+                    self._reports[node] = report
+
+    def start(self):
+        """Poll the nodes on a background thread"""
+        def poll():
+            while True:
+                self.refresh()
+                time.sleep(self.interval)
+
+        threading.Thread(target=poll, name='node-poller', daemon=True).start()
+
+    def reports(self):
+        with self._lock:
+            return dict(self._reports)
+
+
+def choose_node(reports, model_key):
+    """Pick the node that should serve a pair
+
+    Warm nodes win, least queued first and then fastest. Otherwise the pair
+    goes to its highest rendezvous-weight node with free model memory, so
+    repeated cold requests for a pair converge on the same node.
+    """
+    # Skip nodes whose pool processes for the pair are down, unless every node is
+    serving = {node: report for node, report in reports.items()
+               if model_key not in report.get('unavailable_pairs', [])}
+    reports = serving or reports
+    if not reports:
+        return None
+
+    warm = [node for node, report in reports.items() if model_key in report.get('loaded_pairs', [])]
+    if warm:
+        def load(node):
+            stats = reports[node].get('pairs', {}).get(model_key, {})
+            return stats.get('queue_depth', 0), stats.get('p95_ms') or 0
+        return min(warm, key=load)
+
+    def has_room(node):
+        free_mb = reports[node].get('model_memory', {}).get('free_mb')
+        return free_mb is None or free_mb > 0
+
+    candidates = [node for node in reports if has_room(node)] or list(reports)
+    return max(candidates, key=lambda node: rendezvous_score(node, model_key))
+
+
+def create_app(directory):
+    """Build the routing proxy for a node directory"""
+    app = Flask(__name__)
+
+    def forward(path):
+        data = request.get_json(silent=True) or {}
+        model_key = f"{data.get('source_lang', '').lower()}_{data.get('target_lang', '').lower()}"
+
+        node = choose_node(directory.reports(), model_key)
+        if node is None:
+            return jsonify({
+                'success': False,
+                'error': 'No translation nodes are ready'
+            }), 503
+
+        try:
+            upstream = requests.post(f"{node}{path}", json=data, headers=_forwarded_headers(), timeout=130)
+        except requests.RequestException as e:
+            logger.error(f"Forwarding to {node} failed: {str(e)}")
+            return jsonify({
+                'success': False,
+                'error': 'Translation node unavailable'
+            }), 502
+
+        response = Response(upstream.content, status=upstream.status_code,
+                            content_type=upstream.headers.get('Content-Type'))
+        for header in ('Server-Timing', 'Retry-After'):
+            if header in upstream.headers:
+                response.headers[header] = upstream.headers[header]
+        response.headers['X-Routed-To'] = node
+        return response
+
+    @app.route('/api/translate', methods=['POST'])
+    def translate():
+        return forward('/api/translate')
+
+    @app.route('/api/prefetch', methods=['POST'])
+    def prefetch():
+        return forward('/api/prefetch')
+
+    @app.route('/router/nodes', methods=['GET'])
+    def nodes():
+        return jsonify({
+            'success': True,
+            'nodes': directory.reports()
+        })
+
+    return app
+
+
+def _forwarded_headers():
+    return {name: value for name, value in request.headers.items()
+            if name.lower() in ('x-api-key', 'content-type')}
+
+
+def main():
+    """Start the router in front of the configured nodes"""
+    nodes = [node.strip().rstrip('/') for node in os.environ.get('ROUTER_NODES', '').split(',') if node.strip()]
+    if not nodes:
+        logger.error("Set ROUTER_NODES to a comma-separated list of node URLs")
+        raise SystemExit(1)
+
+    directory = NodeDirectory(nodes, interval=int(os.environ.get('ROUTER_POLL_INTERVAL', 5)))
+    directory.refresh()
+    directory.start()
+
+    port = int(os.environ.get('PORT', 8000))
+    logger.info(f"Routing across {len(nodes)} nodes on port {port}")
+    create_app(directory).run(host='0.0.0.0', port=port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Priority scheduling for the Multilingual Translator
+
+Inference runs in a fixed number of slots. Interactive requests are always
+granted a free slot ahead of bulk requests, except that bulk work is
+guaranteed a minimum share of grants so large jobs never starve.
+"""
+
+import math
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from metrics import percentile
+
+PRIORITIES = ('interactive', 'bulk')
+
+
+class PriorityScheduler:
+    """Grants inference slots to interactive work first, with a bulk floor"""
+
+    def __init__(self, concurrency=1, bulk_min_share=0.2, window=100):
+        if not 0 < bulk_min_share < 1:
+            raise ValueError(f'Bulk minimum share must be between 0 and 1, got {bulk_min_share}')
+
+        self.concurrency = max(1, concurrency)
+        # While both lanes wait, grants alternate between runs of at most this
+        # many interactive and bulk requests, which gives bulk at least its share
+        if bulk_min_share <= 0.5:
+            self.max_interactive_streak = math.floor((1 - bulk_min_share) / bulk_min_share)
+            self.max_bulk_streak = 1
+        else:
+            self.max_interactive_streak = 1
+            self.max_bulk_streak = math.ceil(bulk_min_share / (1 - bulk_min_share))
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        self._granted = set()
+        self._active = 0
+        self._interactive_streak = 0
+        self._bulk_streak = 0
+        self._waits = {priority: deque(maxlen=window) for priority in PRIORITIES}
+        self._completed = {priority: 0 for priority in PRIORITIES}
+        self._condition = threading.Condition()
+
+    def _next_priority(self):
+        interactive, bulk = self._queues['interactive'], self._queues['bulk']
+        if not bulk:
+            return 'interactive' if interactive else None
+        if not interactive:
+            return 'bulk'
+        if self._interactive_streak >= self.max_interactive_streak:
+            return 'bulk'
+        if 0 < self._bulk_streak < self.max_bulk_streak:
+            return 'bulk'
+        return 'interactive'
+
+    def _dispatch(self):
+        while self._active < self.concurrency:
+            priority = self._next_priority()
+            if priority is None:
+                return
+
+            # Streaks only count grants made while the other lane was waiting
+            if priority == 'bulk':
+                self._interactive_streak = 0
+                self._bulk_streak = self._bulk_streak + 1 if self._queues['interactive'] else 0
+            else:
+                self._bulk_streak = 0
+                self._interactive_streak = self._interactive_streak + 1 if self._queues['bulk'] else 0
+
+            self._granted.add(self._queues[priority].popleft())
+            self._active += 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, priority, timer=None):
+        """Hold an inference slot for the enclosed block
+
+        The queue wait is recorded for the priority class and, if a timer is
+        given, as its 'queue' stage.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f'Priority "{priority}" is not supported')
+
+        ticket = object()
+        started = time.perf_counter()
+        with self._condition:
+            self._queues[priority].append(ticket)
+            self._dispatch()
+            while ticket not in self._granted:
+                self._condition.wait()
+            self._granted.remove(ticket)
+
+            wait_ms = (time.perf_counter() - started) * 1000
+            self._waits[priority].append(wait_ms)
+            self._completed[priority] += 1
+
+        if timer is not None:
+            timer.record('queue', wait_ms)
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._dispatch()
+
+    def stats(self):
+        """Get queued requests and queue wait percentiles per priority class"""
+        with self._condition:
+            classes = {}
+            for priority in PRIORITIES:
+                waits = list(self._waits[priority])
+                p50 = percentile(waits, 0.5)
+                p95 = percentile(waits, 0.95)
+                classes[priority] = {
+                    'queued': len(self._queues[priority]),
+                    'scheduled': self._completed[priority],
+                    'wait_p50_ms': round(p50, 2) if p50 is not None else None,
+                    'wait_p95_ms': round(p95, 2) if p95 is not None else None
+                }
+            return classes
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Lexical vocabulary shortlists for MarianMT decoding
+
+A shortlist maps each source token to the target tokens it is likely to
+translate into, learned offline from a parallel sample. At inference the
+decoder's output projection is cut down to the union of the shortlisted
+tokens for the batch, so every decoding step scores a few thousand
+candidates instead of the full target vocabulary.
+
+Usage:
+    python shortlist.py --source en --target es --parallel sample.tsv
+"""
+
+import os
+import sys
+import copy
+import json
+import argparse
+import logging
+from collections import Counter, defaultdict
+import torch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHORTLIST_DIR = 'shortlists'
+
+
+class Shortlist:
+    """Per-pair table of likely target tokens for each source token"""
+
+    def __init__(self, table, frequent):
+        self.table = table
+        self.frequent = frequent
+
+    def candidates(self, input_ids, special_ids):
+        """Get the sorted target vocabulary for a batch of source token ids"""
+        vocab = set(self.frequent)
+        vocab.update(special_ids)
+        for token_id in input_ids.unique().tolist():
+            vocab.update(self.table.get(token_id, ()))
+        return sorted(vocab)
+
+
+def shortlist_path(model_key, directory=DEFAULT_SHORTLIST_DIR):
+    """Get the file a pair's shortlist is stored in"""
+    return os.path.join(directory, f"{model_key}.json")
+
+
+def load_shortlist(model_key, directory=DEFAULT_SHORTLIST_DIR):
+    """Load a pair's shortlist, or None if none has been built"""
+    path = shortlist_path(model_key, directory)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    table = {int(token_id): targets for token_id, targets in data['table'].items()}
+    return Shortlist(table, data['frequent'])
+
+
+def build_shortlist(tokenizer, sentence_pairs, top_k=50, frequent=500):
+    """Learn a shortlist from (source, target) sentence pairs
+
+    Target tokens are ranked for each source token by their Dice coefficient
+    over sentence co-occurrences. The `frequent` most common target tokens
+    are always allowed so function words never fall off the list.
+    """
+    source_counts = Counter()
+    target_counts = Counter()
+    cooccurrences = defaultdict(Counter)
+
+    for source_text, target_text in sentence_pairs:
+        source_ids = set(tokenizer(source_text).input_ids)
+        target_ids = set(tokenizer(text_target=target_text).input_ids)
+
+        source_counts.update(source_ids)
+        target_counts.update(target_ids)
+        for source_id in source_ids:
+            cooccurrences[source_id].update(target_ids)
+
+    table = {}
+    for source_id, targets in cooccurrences.items():
+        scored = sorted(
+            targets.items(),
+            key=lambda item: 2 * item[1] / (source_counts[source_id] + target_counts[item[0]]),
+            reverse=True
+        )
+        table[source_id] = [target_id for target_id, _ in scored[:top_k]]
+
+    return {
+        'top_k': top_k,
+        'frequent': [target_id for target_id, _ in target_counts.most_common(frequent)],
+        'table': table
+    }
+
+
+def shallow_copy(module):
+    """Copy a module so its children can be swapped without touching the original"""
+    clone = copy.copy(module)
+    clone._modules = module._modules.copy()
+    clone._parameters = module._parameters.copy()
+    clone._buffers = module._buffers.copy()
+    return clone
+
+
+class VocabularyProjection(torch.nn.Module):
+    """Bias-free output projection over a subset of the vocabulary"""
+
+    def __init__(self, weight):
+        super().__init__()
+        self.register_buffer('weight', weight)
+
+    def forward(self, hidden_states):
+        return torch.nn.functional.linear(hidden_states, self.weight)
+
+
+def restrict_vocabulary(model, vocab_ids):
+    """Get a view of a MarianMT model whose decoder only knows `vocab_ids`
+
+    The returned model shares every weight with the original except the
+    decoder embeddings, output projection and logits bias, which are sliced
+    to the shortlisted rows. Token ids it produces index into `vocab_ids`.
+    """
+    # Compiled graphs are specialised to the full vocabulary, so use the eager decoder
+    decoder = getattr(model.model.decoder, '_orig_mod', model.model.decoder)
+    embedding_weight = decoder.embed_tokens.weight[vocab_ids]
+    projection_weight = model.lm_head.weight[vocab_ids]
+
+    clone = shallow_copy(model)
+    clone.model = shallow_copy(model.model)
+    clone.model.decoder = shallow_copy(decoder)
+
+    clone.model.decoder.embed_tokens = torch.nn.Embedding.from_pretrained(embedding_weight)
+    clone.lm_head = VocabularyProjection(projection_weight)
+    clone.final_logits_bias = model.final_logits_bias[:, vocab_ids]
+    return clone
+
+
+def generate_with_shortlist(model, tokenizer, shortlist, inputs, required_ids=(), **generate_kwargs):
+    """Run `model.generate` over the batch's shortlisted target vocabulary
+
+    `required_ids` are always kept in the vocabulary, e.g. the tokens of
+    span placeholders that must come through in the output.
+    """
+    config = model.config
+    special_ids = {tokenizer.pad_token_id, tokenizer.eos_token_id, tokenizer.unk_token_id,
+                   config.decoder_start_token_id}
+    special_ids.update(required_ids)
+    vocab = shortlist.candidates(inputs['input_ids'], special_ids)
+    position = {token_id: index for index, token_id in enumerate(vocab)}
+    vocab_ids = torch.tensor(vocab, dtype=torch.long)
+
+    outputs = restrict_vocabulary(model, vocab_ids).generate(
+        **inputs,
+        decoder_start_token_id=position[config.decoder_start_token_id],
+        pad_token_id=position[tokenizer.pad_token_id],
+        eos_token_id=position[tokenizer.eos_token_id],
+        bad_words_ids=[[position[tokenizer.pad_token_id]]],
+        **generate_kwargs
+    )
+    return vocab_ids[outputs]
+
+
+def read_parallel(path, limit=None):
+    """Read tab-separated (source, target) sentence pairs"""
+    pairs = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) < 2 or not parts[0].strip() or not parts[1].strip():
+                continue
+            pairs.append((parts[0], parts[1]))
+            if limit and len(pairs) >= limit:
+                break
+    return pairs
+
+
+def main():
+    """Build a shortlist for one language pair from a parallel sample"""
+    parser = argparse.ArgumentParser(description='Build a vocabulary shortlist for a language pair')
+    parser.add_argument('--source', required=True, help='Source language code')
+    parser.add_argument('--target', required=True, help='Target language code')
+    parser.add_argument('--parallel', required=True, help='Tab-separated source/target sample')
+    parser.add_argument('--top-k', type=int, default=50, help='Target tokens kept per source token')
+    parser.add_argument('--frequent', type=int, default=500, help='Most frequent target tokens always kept')
+    parser.add_argument('--limit', type=int, help='Maximum sentence pairs to read')
+    parser.add_argument('--output-dir', default=os.environ.get('SHORTLIST_DIR', DEFAULT_SHORTLIST_DIR))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    from transformers import MarianTokenizer
+    from languages import get_model_name
+
+    model_name = get_model_name(args.source, args.target)
+    if not model_name:
+        print(f"❌ Translation from {args.source} to {args.target} is not supported")
+        sys.exit(1)
+
+    pairs = read_parallel(args.parallel, args.limit)
+    logger.info(f"Building shortlist for {model_name} from {len(pairs)} sentence pairs")
+
+    tokenizer = MarianTokenizer.from_pretrained(model_name)
+    shortlist = build_shortlist(tokenizer, pairs, top_k=args.top_k, frequent=args.frequent)
+    shortlist['model_name'] = model_name
+
+    path = shortlist_path(f"{args.source}_{args.target}", args.output_dir)
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(shortlist, f)
+
+    print(f"✅ Wrote shortlist for {len(shortlist['table'])} source tokens to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Non-translatable span handling for the Multilingual Translator
+
+URLs, email addresses, long numbers, code and markup are swapped for compact
+numbered placeholders before tokenization and put back afterwards. This
+shortens the sequences the model decodes and stops it from mangling text
+that must come through verbatim.
+"""
+
+import re
+
+# Earlier patterns win where matches overlap
+NON_TRANSLATABLE_PATTERNS = [
+    r'```.*?```',                                     # fenced code
+    r'`[^`\n]+`',                                     # inline code
+    r'</?[A-Za-z][\w:-]*(?:\s[^<>]*)?/?>',            # markup tags
+    r'(?:https?://|www\.)[^\s<>"]+[^\s<>".,;:!?)\]]', # URLs
+    r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+',                  # email addresses
+    r'(?<!\w)(?P<number>[-+]?\d+(?:[.,:/-]\d+)+|\d{5,})(?!\w)', # grouped numbers, dates and times
+]
+
+SPAN_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in NON_TRANSLATABLE_PATTERNS), re.DOTALL)
+PLACEHOLDER_PATTERN = re.compile(r'\[\s*(\d+)\s*\]')
+
+
+def protect_spans(text):
+    """Replace non-translatable spans with placeholders
+
+    Returns the shortened text and the list of spans, where the span at
+    index i replaces placeholder [i]. Numbers no longer than their
+    placeholder are left in place, since swapping them would not shorten
+    the input.
+    """
+    spans = []
+
+    def placeholder(match):
+        marker = f'[{len(spans)}]'
+        if match.group('number') and len(match.group(0)) <= len(marker):
+            return match.group(0)
+        spans.append(match.group(0))
+        return marker
+
+    return SPAN_PATTERN.sub(placeholder, text), spans
+
+
+def has_translatable_text(masked_text):
+    """Check whether anything but placeholders, punctuation and spaces is left"""
+    return any(char.isalpha() for char in PLACEHOLDER_PATTERN.sub('', masked_text))
+
+
+def restore_spans(translated_text, spans):
+    """Put the original spans back in place of their placeholders
+
+    Spans whose placeholder the model dropped are appended, so nothing
+    from the input is lost.
+    """
+    restored = set()
+
+    def original(match):
+        index = int(match.group(1))
+        if index >= len(spans):
+            return match.group(0)
+        restored.add(index)
+        return spans[index]
+
+    result = PLACEHOLDER_PATTERN.sub(original, translated_text)
+    missing = [span for index, span in enumerate(spans) if index not in restored]
+    if missing:
+        result = ' '.join([result] + missing)
+    return result
@@ -4,6 +4,8 @@ class TranslatorApp {
         this.isTranslating = false;
         this.autoTranslateTimeout = null;
         this.autoTranslateEnabled = false;
+        this.liveSocket = null;
+        this.liveRequestId = 0;
         this.init();
     }
 
@@ -50,6 +52,7 @@ class TranslatorApp {
         // Set default values
         sourceSelect.value = 'en';
         targetSelect.value = 'es';
+        this.prefetchModel();
     }
 
     setupEventListeners() {
@@ -103,11 +106,13 @@ class TranslatorApp {
         // Auto-translate on language change
         document.getElementById('source-lang').addEventListener('change', () => {
             this.updateTranslationInfo();
+            this.prefetchModel();
             this.handleAutoTranslate();
         });
 
         document.getElementById('target-lang').addEventListener('change', () => {
             this.updateTranslationInfo();
+            this.prefetchModel();
             this.handleAutoTranslate();
         });
 
@@ -147,12 +152,22 @@ class TranslatorApp {
                 body: JSON.stringify({
                     text: sourceText,
                     source_lang: sourceLang,
-                    target_lang: targetLang
+                    target_lang: targetLang,
+                    priority: 'interactive'
                 })
             });
 
             const data = await response.json();
 
+            if (response.status === 503 && data.loading) {
+                // The model is still loading on the server; retry when it suggests
+                const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 2;
+                const percent = Math.round((data.loading.progress || 0) * 100);
+                this.showToast(`Loading translation model... ${percent}%`, 'info');
+                setTimeout(() => this.translate(), retryAfter * 1000);
+                return;
+            }
+
             if (data.success) {
                 document.getElementById('translated-text').value = data.translated_text;
                 this.updateTranslationInfo();
@@ -168,6 +183,27 @@ class TranslatorApp {
         }
     }
 
+    prefetchModel() {
+        const sourceLang = document.getElementById('source-lang').value;
+        const targetLang = document.getElementById('target-lang').value;
+
+        if (!sourceLang || !targetLang || sourceLang === targetLang) return;
+
+        // Fire and forget: the server loads the model before the user clicks Translate
+        fetch('/api/prefetch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                source_lang: sourceLang,
+                target_lang: targetLang
+            })
+        }).catch((error) => {
+            console.error('Prefetch error:', error);
+        });
+    }
+
     async detectLanguage() {
         const sourceText = document.getElementById('source-text').value.trim();
 
@@ -192,6 +228,7 @@ class TranslatorApp {
             if (data.success) {
                 document.getElementById('source-lang').value = data.detected_language;
                 this.updateTranslationInfo();
+                this.prefetchModel();
                 this.showToast(`Detected language: ${data.language_name}`, 'info');
             } else {
                 this.showToast(data.error || 'Language detection failed', 'error');
@@ -211,6 +248,7 @@ class TranslatorApp {
         // Swap language selections
         document.getElementById('source-lang').value = targetLang;
         document.getElementById('target-lang').value = sourceLang;
+        this.prefetchModel();
 
         // Swap text content
         document.getElementById('source-text').value = translatedText;
@@ -349,14 +387,67 @@ class TranslatorApp {
         if (this.autoTranslateEnabled) {
             toggle.classList.add('active');
             toggle.innerHTML = '<i class="fas fa-magic"></i> Auto Translate ON';
+            this.openLiveSession();
             this.showToast('Auto-translate enabled', 'success');
         } else {
             toggle.classList.remove('active');
             toggle.innerHTML = '<i class="fas fa-magic"></i> Auto Translate';
+            this.closeLiveSession();
             this.showToast('Auto-translate disabled', 'info');
         }
     }
 
+    openLiveSession() {
+        if (!('WebSocket' in window) || this.liveSocket) return;
+
+        const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const socket = new WebSocket(`${protocol}//${window.location.host}/ws/translate`);
+
+        socket.addEventListener('message', (event) => {
+            const data = JSON.parse(event.data);
+
+            // Ignore anything but the result for the latest text
+            if (data.id !== this.liveRequestId) return;
+
+            if (data.success) {
+                document.getElementById('translated-text').value = data.translated_text;
+                this.updateTranslationInfo();
+            } else {
+                this.showToast(data.error || 'Translation failed', 'error');
+            }
+        });
+
+        socket.addEventListener('close', () => {
+            if (this.liveSocket === socket) {
+                this.liveSocket = null;
+            }
+        });
+
+        this.liveSocket = socket;
+    }
+
+    closeLiveSession() {
+        if (this.liveSocket) {
+            this.liveSocket.close();
+            this.liveSocket = null;
+        }
+    }
+
+    sendLiveTranslation() {
+        if (!this.liveSocket || this.liveSocket.readyState !== WebSocket.OPEN) {
+            return false;
+        }
+
+        this.liveRequestId += 1;
+        this.liveSocket.send(JSON.stringify({
+            id: this.liveRequestId,
+            text: document.getElementById('source-text').value.trim(),
+            source_lang: document.getElementById('source-lang').value,
+            target_lang: document.getElementById('target-lang').value
+        }));
+        return true;
+    }
+
     handleAutoTranslate() {
         if (!this.autoTranslateEnabled) return;
 
@@ -371,10 +462,15 @@ class TranslatorApp {
 
         // Only auto-translate if we have text and both languages selected
         if (sourceText && sourceLang && targetLang && sourceLang !== targetLang) {
-            // Debounce the translation to avoid too many API calls
+            // The live session cancels superseded translations on the server,
+            // so it can use a much shorter debounce than the REST fallback
+            const liveSession = this.liveSocket && this.liveSocket.readyState === WebSocket.OPEN;
+
             this.autoTranslateTimeout = setTimeout(() => {
-                this.translate();
-            }, 1000); // Wait 1 second after user stops typing
+                if (!this.sendLiveTranslation()) {
+                    this.translate();
+                }
+            }, liveSession ? 300 : 1000);
         }
     }
 }
@@ -25,6 +25,26 @@ def test_health_check():
         print(f"❌ Health check error: {e}")
         return False
 
+def test_readiness():
+    """Test the readiness endpoint"""
+    print("\nTesting readiness...")
+    try:
+        response = requests.get(f"{BASE_URL}/health/ready")
+        if response.status_code == 200:
+            data = response.json()
+            if all(key in data for key in ('loaded_pairs', 'pairs', 'model_memory')):
+                print(f"✅ Readiness passed: {len(data['loaded_pairs'])} pairs loaded")
+                return True
+            else:
+                print(f"❌ Readiness failed: {data}")
+                return False
+        else:
+            print(f"❌ Readiness failed: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Readiness error: {e}")
+        return False
+
 def test_get_languages():
     """Test the languages endpoint"""
     print("\nTesting get languages...")
@@ -45,6 +65,17 @@ def test_get_languages():
         print(f"❌ Languages endpoint error: {e}")
         return False
 
+def post_translate(payload, attempts=30):
+    """POST a translation, retrying while the model is still loading"""
+    for _ in range(attempts):
+        response = requests.post(f"{BASE_URL}/api/translate", json=payload)
+        if response.status_code != 503:
+            return response
+        retry_after = int(response.headers.get('Retry-After', 2))
+        print(f"    ⏳ Model loading, retrying in {retry_after}s")
+        time.sleep(retry_after)
+    return response
+
 def test_translate():
     """Test the translation endpoint"""
     print("\nTesting translation...")
@@ -66,14 +97,11 @@ def test_translate():
     for i, test_case in enumerate(test_cases, 1):
         print(f"  Test case {i}: {test_case['text']} ({test_case['source_lang']} -> {test_case['target_lang']})")
         try:
-            response = requests.post(
-                f"{BASE_URL}/api/translate",
-                json={
-                    "text": test_case["text"],
-                    "source_lang": test_case["source_lang"],
-                    "target_lang": test_case["target_lang"]
-                }
-            )
+            response = post_translate({
+                "text": test_case["text"],
+                "source_lang": test_case["source_lang"],
+                "target_lang": test_case["target_lang"]
+            })
             
             if response.status_code == 200:
                 data = response.json()
@@ -99,6 +127,64 @@ def test_translate():
     
     return True
 
+def test_protected_spans():
+    """Test that URLs come back verbatim, with or without text around them"""
+    print("\nTesting protected spans...")
+    url = "https://example.com/docs?page=2"
+    test_cases = [url, f"Read the guide at {url} before you start"]
+    
+    for i, text in enumerate(test_cases, 1):
+        print(f"  Test case {i}: {text}")
+        try:
+            response = post_translate({
+                "text": text,
+                "source_lang": "en",
+                "target_lang": "es"
+            })
+            if response.status_code != 200:
+                print(f"    ❌ Translation request failed: {response.status_code}")
+                return False
+            
+            translated = response.json().get('translated_text', '')
+            if i == 1 and translated != url:
+                print(f"    ❌ Bare URL was changed: {translated}")
+                return False
+            if url not in translated:
+                print(f"    ❌ URL was not kept verbatim: {translated}")
+                return False
+            print(f"    ✅ URL kept verbatim: {translated}")
+        except Exception as e:
+            print(f"    ❌ Protected spans error: {e}")
+            return False
+    
+    return True
+
+def test_timings():
+    """Test the Server-Timing header and include_timings"""
+    print("\nTesting stage timings...")
+    try:
+        response = post_translate({
+            "text": "Good evening",
+            "source_lang": "en",
+            "target_lang": "es",
+            "include_timings": True
+        })
+        if response.status_code != 200:
+            print(f"❌ Timings request failed: {response.status_code}")
+            return False
+        
+        server_timing = response.headers.get('Server-Timing', '')
+        timings = response.json().get('timings', {})
+        if 'total' in server_timing and 'generate' in server_timing and 'total' in timings:
+            print(f"✅ Timings passed: {server_timing}")
+            return True
+        else:
+            print(f"❌ Timings missing: header={server_timing!r}, body={timings}")
+            return False
+    except Exception as e:
+        print(f"❌ Timings error: {e}")
+        return False
+
 def test_detect_language():
     """Test the language detection endpoint"""
     print("\nTesting language detection...")
@@ -183,6 +269,27 @@ def test_error_handling():
         print(f"    ❌ Error handling test failed: {e}")
         return False
     
+    # Test invalid priority
+    print("  Testing invalid priority...")
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/translate",
+            json={
+                "text": "Hello",
+                "source_lang": "en",
+                "target_lang": "es",
+                "priority": "urgent"
+            }
+        )
+        if response.status_code == 400:
+            print("    ✅ Invalid priority handled correctly")
+        else:
+            print(f"    ❌ Invalid priority not handled: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"    ❌ Error handling test failed: {e}")
+        return False
+    
     return True
 
 def main():
@@ -192,8 +299,11 @@ def main():
     
     tests = [
         test_health_check,
+        test_readiness,
         test_get_languages,
         test_translate,
+        test_protected_spans,
+        test_timings,
         test_detect_language,
         test_error_handling
     ]